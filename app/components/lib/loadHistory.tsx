@@ -0,0 +1,477 @@
+type TypedArray =
+  | Float64Array
+  | Float32Array
+  | Int32Array
+  | Int16Array
+  | Int8Array
+  | Uint8Array;
+
+interface ColumnHeader {
+  dtype: "float64" | "float32" | "int32" | "int16" | "int8" | "uint8";
+  shape: number[];
+  offset: number;
+}
+
+interface ChunkHeader {
+  nFrames: number;
+  directions: Record<string, number[]>;
+  columns: Record<string, ColumnHeader>;
+}
+
+export interface HistoryIndex {
+  version: number;
+  nFrames: number;
+  nSteps: number;
+  timeStep: number;
+  chunkSize: number;
+  entities: Record<string, number[]>;
+  counts: Record<string, number>;
+  chunks: {
+    file: string;
+    firstFrame: number;
+    firstStep: number;
+    bytes: number;
+  }[];
+}
+
+// Chunk as written in the file, with a keyframe followed by the changes
+export interface EncodedChunk {
+  header: ChunkHeader;
+  columns: Record<string, TypedArray>;
+}
+
+// State of every frame of a chunk. Sliders and beams have one row per frame,
+// the items of the frame t are the rows offset[t] to offset[t + 1] of theirs.
+// The distance travelled by each belt is given for every frame as well
+export interface HistoryChunk {
+  nFrames: number;
+  // Time step of each frame
+  steps: TypedArray;
+  directions: Record<string, number[]>;
+  nSliders: number;
+  DoF: number;
+  nBeams: number;
+  columns: Record<string, TypedArray>;
+}
+
+export interface StepHistory {
+  targets: Record<string, any>;
+  drops: Record<string, any>;
+  sliders: Record<string, any>;
+  beams: Record<string, any>;
+}
+
+export interface HistorySource {
+  nSteps: number;
+  step: (t: number) => StepHistory;
+  // Resolves once the time step t can be shown
+  load: (t: number) => Promise<void>;
+}
+
+const typedArrays = {
+  float64: Float64Array,
+  float32: Float32Array,
+  int32: Int32Array,
+  int16: Int16Array,
+  int8: Int8Array,
+  uint8: Uint8Array,
+};
+
+// Number of chunks kept loaded before and after the one of the playhead
+const chunksBehind = 1;
+const chunksAhead = 2;
+
+// Reads a chunk written by script/scripts/history_handler.py, starting at
+// byteOffset in the buffer. The columns are views on the buffer, no value is
+// copied
+export const parseChunk = (
+  buffer: ArrayBuffer,
+  byteOffset: number = 0
+): EncodedChunk => {
+  const headerLength = new DataView(buffer, byteOffset).getUint32(0, true);
+  const header = JSON.parse(
+    new TextDecoder().decode(
+      new Uint8Array(buffer, byteOffset + 4, headerLength)
+    )
+  ) as ChunkHeader;
+  const start = byteOffset + 4 + headerLength;
+
+  const columns: Record<string, TypedArray> = {};
+  for (const [name, column] of Object.entries(header.columns)) {
+    const length = column.shape.reduce((a, b) => a * b, 1);
+    columns[name] = new typedArrays[column.dtype](
+      buffer,
+      start + column.offset,
+      length
+    );
+  }
+  return { header, columns };
+};
+
+// Rebuilds the values of every frame, from the ones of the first frame, the
+// bitmask of the values that changed in each frame and their new values
+const decodeChanges = (chunk: EncodedChunk, name: string) => {
+  const { header, columns } = chunk;
+  const key = columns[`${name}.key`];
+  const changed = columns[`${name}.changed`];
+  const value = columns[`${name}.value`];
+  const n = key.length;
+  const nBytes = header.columns[`${name}.changed`].shape[1];
+
+  const values = new (key.constructor as any)(header.nFrames * n) as TypedArray;
+  values.set(key);
+  let v = 0;
+  for (let f = 1; f < header.nFrames; f++) {
+    values.copyWithin(f * n, (f - 1) * n, f * n);
+    for (let j = 0; j < n; j++) {
+      // Bits are packed from the most significant one, as np.packbits does
+      const byte = changed[(f - 1) * nBytes + (j >> 3)];
+      if ((byte >> (7 - (j & 7))) & 1) {
+        values[f * n + j] = value[v++];
+      }
+    }
+  }
+  return values;
+};
+
+// Rebuilds the items of every frame, from the ones that appear, disappear or
+// change status, and the distance travelled by their belt
+const decodeItems = (chunk: EncodedChunk, name: string) => {
+  const { header, columns } = chunk;
+  const direction = header.directions[name];
+  const col = (field: string) => columns[`${name}.${field}`];
+  const [birthFrame, birthID, birthPos, birthStatus] = [
+    col("birth.frame"),
+    col("birth.id"),
+    col("birth.beltPos"),
+    col("birth.status"),
+  ];
+  const [deathFrame, deathID] = [col("death.frame"), col("death.id")];
+  const [statusFrame, statusID, statusValue] = [
+    col("status.frame"),
+    col("status.id"),
+    col("status.value"),
+  ];
+  const [beltFrame, beltOffset, beltDistance] = [
+    col("belt.frame"),
+    col("belt.offset"),
+    col("belt.distance"),
+  ];
+
+  let ids: number[] = [];
+  let beltPos: number[] = [];
+  let status: number[] = [];
+  let [b, d, s, e] = [0, 0, 0, 0];
+  let offset = 0;
+  let distance = 0;
+  const offsets = new Int32Array(header.nFrames + 1);
+  const beltOffsets = new Float64Array(header.nFrames);
+  const frames: { ids: number[]; beltPos: number[]; status: number[] }[] = [];
+  for (let f = 0; f < header.nFrames; f++) {
+    // The offset is accumulated as the simulation did, to get the same values
+    if (e < beltFrame.length && beltFrame[e] === f) {
+      offset = beltOffset[e];
+      distance = beltDistance[e];
+      e++;
+    } else {
+      offset += distance;
+    }
+    beltOffsets[f] = offset;
+
+    if (d < deathFrame.length && deathFrame[d] === f) {
+      const dead = new Set<number>();
+      for (; d < deathFrame.length && deathFrame[d] === f; d++) {
+        dead.add(deathID[d]);
+      }
+      const isAlive = ids.map((id) => !dead.has(id));
+      beltPos = beltPos.filter((_, k) => isAlive[k >> 1]);
+      status = status.filter((_, k) => isAlive[k]);
+      ids = ids.filter((_, k) => isAlive[k]);
+    }
+    if (s < statusFrame.length && statusFrame[s] === f) {
+      status = [...status];
+      for (; s < statusFrame.length && statusFrame[s] === f; s++) {
+        status[ids.indexOf(statusID[s])] = statusValue[s];
+      }
+    }
+    if (b < birthFrame.length && birthFrame[b] === f) {
+      ids = [...ids];
+      beltPos = [...beltPos];
+      status = [...status];
+      for (; b < birthFrame.length && birthFrame[b] === f; b++) {
+        ids.push(birthID[b]);
+        beltPos.push(birthPos[2 * b], birthPos[2 * b + 1]);
+        status.push(birthStatus[b]);
+      }
+    }
+    frames.push({
+      ids,
+      beltPos: beltPos.map((pos, k) => pos + offset * direction[k & 1]),
+      status,
+    });
+    offsets[f + 1] = offsets[f] + ids.length;
+  }
+
+  const nItems = offsets[header.nFrames];
+  const itemsID = new Int32Array(nItems);
+  const itemsPos = new Float64Array(2 * nItems);
+  const itemsStatus = new Int8Array(nItems);
+  frames.forEach((frame, f) => {
+    itemsID.set(frame.ids, offsets[f]);
+    itemsPos.set(frame.beltPos, 2 * offsets[f]);
+    itemsStatus.set(frame.status, offsets[f]);
+  });
+  return {
+    [`${name}.offset`]: offsets,
+    [`${name}.id`]: itemsID,
+    [`${name}.position`]: itemsPos,
+    [`${name}.status`]: itemsStatus,
+    [`${name}.belt`]: beltOffsets,
+  };
+};
+
+// Rebuilds the state of every frame of a chunk
+export const decodeChunk = (chunk: EncodedChunk): HistoryChunk => {
+  const { header } = chunk;
+  const [nSliders, DoF] = header.columns["sliders.position.key"].shape;
+  return {
+    nFrames: header.nFrames,
+    steps: chunk.columns["steps"],
+    directions: header.directions,
+    nSliders,
+    DoF,
+    nBeams: header.columns["beams.status.key"].shape[0],
+    columns: {
+      "sliders.position": decodeChanges(chunk, "sliders.position"),
+      "sliders.status": decodeChanges(chunk, "sliders.status"),
+      "beams.status": decodeChanges(chunk, "beams.status"),
+      ...decodeItems(chunk, "targets"),
+      ...decodeItems(chunk, "drops"),
+    },
+  };
+};
+
+const rows = (
+  values: TypedArray,
+  start: number,
+  end: number,
+  width: number
+) => {
+  const list: number[][] = [];
+  for (let i = start; i < end; i++) {
+    list.push(Array.from(values.subarray(i * width, (i + 1) * width)));
+  }
+  return list;
+};
+
+// Rebuilds the snapshot of the frame t of a chunk, with the layout of the json
+// history
+export const chunkStep = (chunk: HistoryChunk, t: number): StepHistory => {
+  const { nSliders, DoF, nBeams, columns } = chunk;
+  const items = (name: string) => {
+    const start = columns[`${name}.offset`][t];
+    const end = columns[`${name}.offset`][t + 1];
+    return {
+      position: rows(columns[`${name}.position`], start, end, 2),
+      status: Array.from(columns[`${name}.status`].subarray(start, end)),
+    };
+  };
+
+  return {
+    targets: items("targets"),
+    drops: items("drops"),
+    sliders: {
+      position: rows(
+        columns["sliders.position"],
+        t * nSliders,
+        (t + 1) * nSliders,
+        DoF
+      ),
+      status: Array.from(
+        columns["sliders.status"].subarray(t * nSliders, (t + 1) * nSliders)
+      ),
+    },
+    beams: {
+      status: Array.from(
+        columns["beams.status"].subarray(t * nBeams, (t + 1) * nBeams)
+      ),
+    },
+  };
+};
+
+// Snapshot of a time step between the frame i of chunk and the frame j of
+// next. The sliders move in a straight line from one frame to the other, and
+// the items with their belt, w being the fraction of the way done. The status
+// are the ones of the first frame
+export const interpolateStep = (
+  chunk: HistoryChunk,
+  i: number,
+  next: HistoryChunk,
+  j: number,
+  w: number
+): StepHistory => {
+  const snapshot = chunkStep(chunk, i);
+  const after = chunkStep(next, j);
+
+  snapshot.sliders.position = snapshot.sliders.position.map(
+    (position: number[], s: number) =>
+      position.map(
+        (x, d) => x + w * (after.sliders.position[s][d] - x)
+      )
+  );
+  for (const name of ["targets", "drops"] as const) {
+    const beltBefore = chunk.columns[`${name}.belt`][i];
+    const distance = w * (next.columns[`${name}.belt`][j] - beltBefore);
+    const direction = chunk.directions[name];
+    snapshot[name].position = snapshot[name].position.map(
+      (position: number[]) => position.map((x, d) => x + distance * direction[d])
+    );
+  }
+  return snapshot;
+};
+
+// Index of the last element of sorted that is lower or equal to value
+const lastBelow = (
+  sorted: ArrayLike<number>,
+  value: number,
+  length: number = sorted.length
+) => {
+  let [low, high] = [0, length - 1];
+  while (low < high) {
+    const middle = (low + high + 1) >> 1;
+    if (sorted[middle] <= value) {
+      low = middle;
+    } else {
+      high = middle - 1;
+    }
+  }
+  return low;
+};
+
+const historyURL = (folderName: String) =>
+  `/api/handleHistory?name=${encodeURIComponent(String(folderName))}`;
+
+export const fetchIndex = async (folderName: String) => {
+  const response = await fetch(historyURL(folderName));
+  if (!response.ok) {
+    throw new Error(`No chunked history for ${folderName}`);
+  }
+  return (await response.json()) as HistoryIndex;
+};
+
+// Fetches the chunks first to last, in a single request
+export const fetchChunks = async (
+  folderName: String,
+  index: HistoryIndex,
+  first: number,
+  last: number
+) => {
+  const start = index.chunks[first].firstFrame;
+  const end = index.chunks[last].firstFrame + index.chunkSize;
+  const response = await fetch(
+    `${historyURL(folderName)}&start=${start}&end=${end}`
+  );
+  if (!response.ok) {
+    throw new Error(`Could not fetch the frames ${start} to ${end}`);
+  }
+  const buffer = await response.arrayBuffer();
+
+  // The chunks are sent one after the other, their size is in the index
+  const chunks = new Map<number, HistoryChunk>();
+  let byteOffset = 0;
+  for (let k = first; k <= last; k++) {
+    chunks.set(k, decodeChunk(parseChunk(buffer, byteOffset)));
+    byteOffset += index.chunks[k].bytes;
+  }
+  return chunks;
+};
+
+// Source of the time steps of a chunked history. Only the chunks around the
+// playhead are kept. The others are fetched when the playhead gets close to
+// them, so opening a history takes the same time whatever its length. The time
+// steps that were not recorded are interpolated from the frames around them
+export const historySource = (
+  folderName: String,
+  index: HistoryIndex
+): HistorySource => {
+  const nChunks = index.chunks.length;
+  const firstSteps = index.chunks.map((chunk) => chunk.firstStep);
+  const chunks = new Map<number, HistoryChunk>();
+  const loading = new Map<number, Promise<void>>();
+  let lastStep = -1;
+  let snapshot: StepHistory;
+
+  const load = async (t: number) => {
+    const k = lastBelow(firstSteps, t);
+    const first = Math.max(0, k - chunksBehind);
+    const last = Math.min(nChunks - 1, k + chunksAhead);
+    for (const c of Array.from(chunks.keys())) {
+      if (c < first || c > last) {
+        chunks.delete(c);
+      }
+    }
+
+    const missing = [];
+    for (let c = first; c <= last; c++) {
+      if (!chunks.has(c) && !loading.has(c)) {
+        missing.push(c);
+      }
+    }
+    if (missing.length > 0) {
+      const from = missing[0];
+      const to = missing[missing.length - 1];
+      const request = fetchChunks(folderName, index, from, to)
+        .then((fetched) => {
+          fetched.forEach((chunk, c) => chunks.set(c, chunk));
+        })
+        .finally(() => {
+          for (let c = from; c <= to; c++) {
+            loading.delete(c);
+          }
+        });
+      for (let c = from; c <= to; c++) {
+        loading.set(c, request);
+      }
+    }
+    await loading.get(k);
+  };
+
+  const step = (t: number) => {
+    if (t !== lastStep) {
+      const k = lastBelow(firstSteps, t);
+      const chunk = chunks.get(k);
+      // Keeps the window around the playhead loaded
+      load(t).catch((err) => console.error("Error loading history:", err));
+      if (!chunk) {
+        // Until the chunk arrives, the last frame shown stays on screen
+        return snapshot;
+      }
+
+      const i = lastBelow(chunk.steps, t, chunk.nFrames);
+      const isLastOfChunk = i + 1 === chunk.nFrames;
+      const next = isLastOfChunk ? chunks.get(k + 1) : chunk;
+      const j = isLastOfChunk ? 0 : i + 1;
+      if (chunk.steps[i] === t || !next) {
+        // After the last frame, it stays on screen
+        snapshot = chunkStep(chunk, i);
+      } else {
+        const w = (t - chunk.steps[i]) / (next.steps[j] - chunk.steps[i]);
+        snapshot = interpolateStep(chunk, i, next, j, w);
+      }
+      // Until the next chunk arrives, the time step is computed again
+      lastStep = next || k === nChunks - 1 || chunk.steps[i] === t ? t : -1;
+    }
+    return snapshot;
+  };
+
+  return { nSteps: index.nSteps, step, load };
+};
+
+// Opens the history of a simulation, with the frames around the start loaded
+export const fetchHistory = async (folderName: String) => {
+  const source = historySource(folderName, await fetchIndex(folderName));
+  await source.load(0);
+  return source;
+};
+
+export default fetchHistory;
@@ -3,6 +3,11 @@
 import React, { useEffect, useState } from "react";
 import ErrorAlert from "../components/ErrorAlert";
 import { loadFile } from "../components/lib/loadFile";
+import {
+  fetchHistory,
+  HistorySource,
+  StepHistory,
+} from "../components/lib/loadHistory";
 import { useData } from "../context/DataContext";
 import CreateCircle from "../components/svgFunctions/createCircle";
 import CreateRect from "../components/svgFunctions/createRect";
@@ -26,15 +31,8 @@ interface Data {
   timeStep: number;
 }
 
-interface History {
-  [key: string]: stepHistory;
-}
-
-interface stepHistory {
-  targets: Record<string, any>;
-  drops: Record<string, any>;
-  sliders: Record<string, any>;
-  beams: Record<string, any>;
+interface LegacyHistory {
+  [key: string]: StepHistory;
 }
 
 interface circleProp {
@@ -68,7 +66,7 @@ const Simulation = () => {
   const [listSlidersArm, setListSlidersArm] = useState<rectProp[]>([]);
   const [listSlidersHead, setListSlidersHead] = useState<circleProp[]>([]);
   const [timerStatus, setTimerStatus] = useState<boolean>(false);
-  const [hist, setHist] = useState<History>();
+  const [hist, setHist] = useState<HistorySource>();
   const [params, setParams] = useState<Data>();
   const [timeStep, setTimeStep] = useState<number>(0);
   const [totalTimesteps, setTotalTimesteps] = useState<number>(0);
@@ -208,17 +206,28 @@ const Simulation = () => {
 
   const loadData = async (folderName: String) => {
     try {
-      const history = (await loadFile(
-        `history/${folderName}/history.json`,
-        "settings"
-      )) as History;
+      let history: HistorySource;
+      try {
+        history = await fetchHistory(folderName);
+      } catch (chunkErr) {
+        // Simulations saved before the chunked history only have a json one
+        const legacy = (await loadFile(
+          `history/${folderName}/history.json`,
+          "settings"
+        )) as LegacyHistory;
+        history = {
+          nSteps: Object.keys(legacy).length,
+          step: (t: number) => legacy[t],
+          load: async () => {},
+        };
+      }
       const params = (await loadFile(
         `history/${folderName}/params.json`,
         "settings"
       )) as Data;
       setHist(history);
       setParams(params);
-      setTotalTimesteps(Object.keys(history).length - 1);
+      setTotalTimesteps(history.nSteps - 1);
       setIsLoading(false);
       // setAlertText("");
     } catch (err) {
@@ -246,7 +255,7 @@ const Simulation = () => {
     const alpha = sliderAlpha;
     const fill = sliderColor;
 
-    for (let i = 0; i < hist[0]["sliders"]["position"].length; i++) {
+    for (let i = 0; i < hist.step(0)["sliders"]["position"].length; i++) {
       sliders.push({
         xy: [-1, -1],
         rectSize,
@@ -266,7 +275,7 @@ const Simulation = () => {
     if (!params || !hist) return null;
 
     var armList: rectProp[] = [];
-    for (let i = 0; i < hist[0]["sliders"]["position"].length; i++) {
+    for (let i = 0; i < hist.step(0)["sliders"]["position"].length; i++) {
       armList.push({
         xy: [-1, -1],
         rectSize: [0, 0],
@@ -282,8 +291,8 @@ const Simulation = () => {
     if (!params || !hist) return null;
 
     var headList: circleProp[] = [];
-    for (let i = 0; i < hist[0]["sliders"]["position"].length; i++) {
-      const position = [...hist[0]["sliders"]["position"][i]];
+    for (let i = 0; i < hist.step(0)["sliders"]["position"].length; i++) {
+      const position = [...hist.step(0)["sliders"]["position"][i]];
       headList.push({
         xy: position,
         r: params.target.width / 2,
@@ -306,7 +315,7 @@ const Simulation = () => {
     // We can probably clean this, it is somewhat redundant
     if (!params || !hist) return null;
 
-    const nbItems = hist[timeStep][variableName]["position"].length;
+    const nbItems = hist.step(timeStep)[variableName]["position"].length;
     const currNbItems = dropTargetVariables[variableName].length;
 
     if (currNbItems > nbItems) {
@@ -317,9 +326,9 @@ const Simulation = () => {
     }
     for (let i = currNbItems; i < nbItems; i++) {
       const newPosition = {
-        xy: hist[timeStep][variableName]["position"][i],
+        xy: hist.step(timeStep)[variableName]["position"][i],
         r: params.target.width / 2,
-        ...(statusColor(hist[timeStep][variableName]["status"][i]) as {
+        ...(statusColor(hist.step(timeStep)[variableName]["status"][i]) as {
           style: { fill: string; strokeWidth: number; stroke: string };
           alpha: number;
         }),
@@ -335,8 +344,8 @@ const Simulation = () => {
   const updatePosition = (variableName: "drops" | "targets", t: number) => {
     if (!params || !hist) return null;
 
-    const newPositions = hist[t][variableName]["position"];
-    const newPositionsStatus = hist[t][variableName]["status"];
+    const newPositions = hist.step(t)[variableName]["position"];
+    const newPositionsStatus = hist.step(t)[variableName]["status"];
     const currNbPositions = dropTargetVariables[variableName].length;
     var tempPositions = [...dropTargetVariables[variableName]];
     for (let i = 0; i < Math.min(currNbPositions, newPositions.length); i++) {
@@ -380,7 +389,7 @@ const Simulation = () => {
         const bDir = params.beam.direction;
         const lengthOffset = side === 1 ? 0 : -tempLength;
 
-        const position = hist[t]["sliders"]["position"][i];
+        const position = hist.step(t)["sliders"]["position"][i];
 
         const defineXY = (j: number) => {
           return (
@@ -396,15 +405,15 @@ const Simulation = () => {
         var nextColor = sliderColor;
         // this if statement is good to capture the transition (so with timeSteps of 1)
         // but bad when jumping to an arbitrary timeStep, as it will not update the color of the slider
-        if (idToStatus(hist[t]["sliders"]["status"][i]) === "Z_MVMT") {
+        if (idToStatus(hist.step(t)["sliders"]["status"][i]) === "Z_MVMT") {
           if (
-            idToStatus(hist[t]["beams"]["status"][Math.floor(i / 2)]) ===
+            idToStatus(hist.step(t)["beams"]["status"][Math.floor(i / 2)]) ===
               "PICKING" &&
             t - timeStep > 0
           ) {
             nextColor = sliderColorPicked;
           } else if (
-            idToStatus(hist[t]["beams"]["status"][Math.floor(i / 2)]) ===
+            idToStatus(hist.step(t)["beams"]["status"][Math.floor(i / 2)]) ===
               "PLACING" &&
             !(t - timeStep > 0)
           ) {
@@ -465,8 +474,13 @@ const Simulation = () => {
     updateSliders(t);
   };
 
-  const handleProgressBar = (event: React.ChangeEvent<HTMLInputElement>) => {
-    nextPosition(parseInt(event.target.value));
+  const handleProgressBar = async (
+    event: React.ChangeEvent<HTMLInputElement>
+  ) => {
+    const t = parseInt(event.target.value);
+    // Jumping far from the playhead needs the chunk of t first
+    await hist?.load(t);
+    nextPosition(t);
     if (initialUpdateDone && timerStatus) {
       clearInterval(timerID);
       startTimer();
@@ -536,11 +550,11 @@ const Simulation = () => {
           <>
             <BeamStatus
               className="join-item border-base-300 bg-base-200 border"
-              beams={hist[timeStep]["beams"]["status"]}
+              beams={hist.step(timeStep)["beams"]["status"]}
             />
             <SliderStatus
               className="join-item border-base-300 bg-base-200 border"
-              sliders={hist[timeStep]["sliders"]["status"]}
+              sliders={hist.step(timeStep)["sliders"]["status"]}
             />
           </>
         )}
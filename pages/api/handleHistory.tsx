@@ -0,0 +1,87 @@
+import type { NextApiRequest, NextApiResponse } from "next";
+import fsPromises from "fs/promises";
+import path from "path";
+
+type ResponseData = {
+  message: string;
+};
+
+type HistoryIndex = {
+  nFrames: number;
+  chunkSize: number;
+  chunks: { file: string; firstFrame: number; bytes: number }[];
+};
+
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse<ResponseData | HistoryIndex | Buffer>
+) {
+  if (req.method !== "GET") {
+    res.setHeader("Allow", ["GET"]);
+    return res
+      .status(405)
+      .json({ message: `Method ${req.method} Not Allowed` });
+  }
+
+  const { name, start, end } = req.query;
+  const sanitizedName = String(name ?? "").replace(/[^a-zA-Z0-9-_]/g, "");
+  if (!sanitizedName) {
+    return res.status(400).json({ message: "Invalid name provided" });
+  }
+  const histDirectory = path.join(
+    process.cwd(),
+    "pages",
+    "api",
+    "history",
+    sanitizedName
+  );
+
+  let index: HistoryIndex;
+  try {
+    const file = await fsPromises.readFile(
+      path.join(histDirectory, "index.json"),
+      "utf-8"
+    );
+    index = JSON.parse(file);
+  } catch (readErr) {
+    console.error("Error reading history index:", readErr);
+    return res.status(404).json({ message: "History not found" });
+  }
+
+  // Without a frame range, only the index is sent
+  if (start === undefined && end === undefined) {
+    return res.status(200).json(index);
+  }
+
+  const firstFrame = Number(start ?? 0);
+  const lastFrame = Math.min(Number(end ?? index.nFrames), index.nFrames) - 1;
+  if (
+    !Number.isInteger(firstFrame) ||
+    !Number.isInteger(lastFrame) ||
+    firstFrame < 0 ||
+    lastFrame < firstFrame
+  ) {
+    return res.status(400).json({ message: "Invalid frame range provided" });
+  }
+
+  try {
+    // Every chunk holding a frame of the range is sent, one after the other
+    const chunks = index.chunks.slice(
+      Math.floor(firstFrame / index.chunkSize),
+      Math.floor(lastFrame / index.chunkSize) + 1
+    );
+    const data = Buffer.concat(
+      await Promise.all(
+        chunks.map((chunk) =>
+          fsPromises.readFile(path.join(histDirectory, chunk.file))
+        )
+      )
+    );
+    res.setHeader("Content-Type", "application/octet-stream");
+    res.setHeader("Content-Length", data.length);
+    res.status(200).send(data);
+  } catch (readErr) {
+    console.error("Error reading history chunks:", readErr);
+    res.status(500).json({ message: "Error reading history chunks" });
+  }
+}
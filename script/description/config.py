@@ -28,6 +28,30 @@ statTemplate = {
     "startRecordingTime_2": 0,
     "totalTimeSteps": 0,
     "dropsInRangePerT": [],
+    "interceptSolves": 0,
+    "interceptEvaluations": 0,
+    "interceptsPruned": 0,
+    "trajectoryCacheHits": 0,
+    "trajectoryCacheMisses": 0,
+    "trajectoryCacheEvictions": 0,
+    "skippedSteps": 0,
+    "trajectoryReplans": 0,
+    "trajectoryReplays": 0,
+    "sliderTransitions": 0,
+    "railTransitions": 0,
+}
+
+"Settings of a simulation, that can be changed from the command line"
+settingsTemplate = {
+    "preMove": False,
+    "stateBouncing": False,
+    "cacheTolerance": 0,
+    "eventDriven": False,
+    "planEvery": 1,
+    "conveyorEvery": 1,
+    "recordEvery": 1,
+    "histEvery": 1,
+    "histAroundEvents": 0,
 }
 
 listStat = []
@@ -35,35 +59,32 @@ listError = []
 
 
 def newStatEntry(params):
-    listStat.append(copy.deepcopy(statTemplate))
-    
-    listStat[-1]["workload"] = (
+    """Creates the stats of a new run, from the template.
+
+    Args:
+        params (dict): description of the parameters used for the simulation
+
+    Returns:
+        dict: The stats of the run
+    """
+    stat = copy.deepcopy(statTemplate)
+
+    stat["workload"] = (
         [0]
         * params["slider"]["slidersPerRail"]
         * params["beam"]["nbOfBeams"]
         * 2
     )
-    listStat[-1]["pickPerSlider"] = (
+    stat["pickPerSlider"] = (
         [0]
         * params["slider"]["slidersPerRail"]
         * params["beam"]["nbOfBeams"]
         * 2
     )
-    listStat[-1]["slidersVelocity"] = (
-        [None]
-        * params["slider"]["slidersPerRail"]
-        * params["beam"]["nbOfBeams"]
-        * 2
-    )
-    listStat[-1]["slidersAcceleration"] = (
-        [None]
-        * params["slider"]["slidersPerRail"]
-        * params["beam"]["nbOfBeams"]
-        * 2
-    )
+    return stat
 
 
-def newErrEntry(e, i, j, paramName, variedParam):
+def newErrEntry(e, seed, i, j, paramName, variedParam):
 
     print(
         f"{LINE_START}{bcolors.FAIL}Error detected at nRuns {i} and \n"
@@ -71,7 +92,7 @@ def newErrEntry(e, i, j, paramName, variedParam):
     )
     subList = {
         "error": e,
-        "seed": listStat[-1]["seed"],
+        "seed": seed,
         "nRunsIdx": i,
         "nRunsParameterIdx": j,
     }
@@ -105,38 +126,82 @@ def defineOutSpeed(inSpeed, params):
 
 
 def newSeed(seed=None):
+    """Picks the seed of a run. Each run creates its own generator from it, instead of using
+    the global one, so that runs in different processes don't share their random stream.
+
+    Args:
+        seed (int, optional): Seed of the run. Defaults to None, to draw a random one.
+
+    Returns:
+        int: The seed of the run
+    """
     c, bu, end = bcolors.OKCYAN, bcolors.BU, bcolors.ENDC
     seed = random.randrange(2**32 - 1) if seed is None else seed
-    
-    print(f"{LINE_START}{c}New seed : {bu}{seed}{end}")
-    listStat[-1]["seed"] = seed
-    random.seed(seed)
-    np.random.seed(seed)
-
-
-def recordSlidersKinematics(sliders):
-    for rail in sliders:
-        for slider in rail:
-            velVal = [
-                slider.currentVelocity[slider.direction[SAME_DIR]],
-                slider.currentVelocity[slider.direction[ORTHOG_DIR]],
-                slider.currentVelocity[2],
-            ]
-            accelVal = [
-                slider.currentAcceleration[slider.direction[SAME_DIR]],
-                slider.currentAcceleration[slider.direction[ORTHOG_DIR]],
-                slider.currentAcceleration[2],
-            ]
-            # if it doesn't exist, we create it
-            if listStat[-1]["slidersVelocity"][slider.ID] is None:
-                listStat[-1]["slidersVelocity"][slider.ID] = [velVal]
-            else:
-                listStat[-1]["slidersVelocity"][slider.ID].append(velVal)
 
-            if listStat[-1]["slidersAcceleration"][slider.ID] is None:
-                listStat[-1]["slidersAcceleration"][slider.ID] = [accelVal]
-            else:
-                listStat[-1]["slidersAcceleration"][slider.ID].append(accelVal)
+    print(f"{LINE_START}{c}New seed : {bu}{seed}{end}")
+    return seed
+
+
+def spawnSeeds(seed, nSeeds):
+    """Spawns independent seeds from a root seed, one for each run of a sweep.
+
+    Args:
+        seed (int): Root seed. None to draw a random one
+        nSeeds (int): Number of seeds to spawn
+
+    Returns:
+        list[int]: The spawned seeds
+    """
+    seedSequence = np.random.SeedSequence(seed)
+    return [int(child.generate_state(1)[0]) for child in seedSequence.spawn(nSeeds)]
+
+
+class SlidersKinematics:
+    def __init__(self, params, nSliders, recordEvery=1):
+        """Velocity and acceleration of every slider, expressed along the beam, across it and
+        vertically. The arrays of (records, sliders, axes) are allocated for the whole duration
+        of the run, and each record is copied in its row.
+
+        Args:
+            params (dict): description of the parameters used for the simulation
+            nSliders (int): Number of sliders of the simulation
+            recordEvery (int, optional): Number of time steps between two records. Defaults
+            to 1.
+        """
+        nSteps = int(np.ceil(round(params["duration"] / params["timeStep"], 6)))
+        nRecords = -(-nSteps // recordEvery)
+        "Velocity and acceleration are the two layers of a record, copied at once"
+        self.records = np.zeros((nRecords, 2, nSliders, 3), dtype=np.float32)
+        self.nRecords = 0
+
+    def record(self, sliderStates, direction):
+        """Copies the current velocity and acceleration of every slider in the next row.
+
+        Args:
+            sliderStates (SliderStates): Kinematic state of every slider
+            direction (list): Direction of the beams
+        """
+        if self.nRecords == len(self.records):
+            "The run went on after its duration, the array is doubled"
+            self.records = np.concatenate((self.records, np.zeros_like(self.records)))
+            if len(self.records) == 0:
+                self.records = np.zeros((1, *self.records.shape[1:]), np.float32)
+
+        axes = [direction[SAME_DIR], direction[ORTHOG_DIR], 2]
+        self.records[self.nRecords] = sliderStates.kinematics[1:, :, axes]
+        self.nRecords += 1
+
+    def results(self):
+        """Returns the records made so far.
+
+        Returns:
+            dict[str, np.ndarray]: Velocity and acceleration, as (records, sliders, axes) arrays,
+            under their name in the stats
+        """
+        return {
+            "slidersVelocity": self.records[: self.nRecords, 0],
+            "slidersAcceleration": self.records[: self.nRecords, 1],
+        }
 
 
 def promptUserValue(string: str, returnType, currentValue):
@@ -187,8 +252,17 @@ def parser(argv=None):
     )
     parser.add_argument(
         "-save_hist",
-        action="store_true",
-        help="Save the simulation as a series of timepoint, for the typescript to read",
+        type=int,
+        nargs="?",
+        const=1,
+        default=0,
+        help="Save the simulation as a series of timepoint, for the typescript to read. Can be followed by the number of time steps between two saved ones (1 if not given)",
+    )
+    parser.add_argument(
+        "-hist_events",
+        type=int,
+        default=0,
+        help="Number of time steps saved at full rate before and after each pick, drop, missed item or unfilled package, when the history skips time steps",
     )
     # parser.add_argument(
     #     "-reset_params",
@@ -231,6 +305,52 @@ def parser(argv=None):
         # action="store_false",
         help="Save the data collected during the simulation",
     )
+    parser.add_argument(
+        "-jobs",
+        type=int,
+        default=1,
+        help="Number of processes running the simulations of a sweep in parallel",
+    )
+    parser.add_argument(
+        "-resume",
+        type=str,
+        default=None,
+        help="Name of an interrupted sweep to resume. The runs already logged are not computed again",
+    )
+    parser.add_argument(
+        "-pick_stream",
+        action="store_true",
+        help="Pre-generate the products of each seed in a file, shared by every run using that seed. In a sweep, every parameter value then sees the same products",
+    )
+    parser.add_argument(
+        "-event_driven",
+        action="store_true",
+        help="Skip the time steps where nothing but the conveyors can move, instead of computing every one of them",
+    )
+    parser.add_argument(
+        "-plan_every",
+        type=int,
+        default=1,
+        help="Number of time steps between two target assignments",
+    )
+    parser.add_argument(
+        "-conveyor_every",
+        type=int,
+        default=1,
+        help="Number of time steps between two generations/deletions of rows on the conveyors. The belts still move at every step",
+    )
+    parser.add_argument(
+        "-record_every",
+        type=int,
+        default=1,
+        help="Number of time steps between two recordings of the sliders' kinematics",
+    )
+    parser.add_argument(
+        "-cache_tolerance",
+        type=float,
+        default=0,
+        help="Tolerance, in mm, under which two trajectories are considered identical and reused. 0 only reuses exact matches",
+    )
     c, c2, cw, b, bu, end = (
         bcolors.OKCYAN,
         bcolors.OKBLUE,
@@ -280,9 +400,6 @@ def parser(argv=None):
 
 
 def initParams(args: argparse.Namespace):
-    global dt
-    global t
-    t = 0
     isPlottingLive = False
     isGifSaved = False
 
@@ -305,19 +422,26 @@ def initParams(args: argparse.Namespace):
 
     print(f"{c}Plotting option : {bu}{args.plot}{end}")
     params = loadJson(False)
-    dt = params["timeStep"]  # Time step in [s]
 
-    global preMove, stateBouncing
-    statTemplate["preMove"] = preMove = args.pre_move
-    statTemplate["stateBouncing"] = stateBouncing = args.state_bouncing
+    settings = copy.deepcopy(settingsTemplate)
+    settings["preMove"] = args.pre_move
+    settings["stateBouncing"] = args.state_bouncing
+    settings["cacheTolerance"] = args.cache_tolerance
+    settings["eventDriven"] = args.event_driven
+    settings["planEvery"] = args.plan_every
+    settings["conveyorEvery"] = args.conveyor_every
+    settings["recordEvery"] = args.record_every
+    settings["histEvery"] = max(args.save_hist, 1)
+    settings["histAroundEvents"] = args.hist_events
 
     return (
         params,
         isPlottingLive,
         isGifSaved,
-        args.save_hist,
+        args.save_hist > 0,
         not (args.no_csv),
         args.single_run,
         args.seed,
-        args.name,
+        args.resume if args.resume is not None else args.name,
+        settings,
     )
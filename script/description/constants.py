@@ -32,6 +32,13 @@ WAITING = 34
 Z_MVMT = 35
 
 
+###--- Side effects of a slider transition, combined as bit flags ---###
+DELETE_TARGET = 1
+COUNT_PICK = 2
+START_Z_TIMER = 4
+WAIT_Z_TIMER = 8
+
+
 ###------- Direction Acronym -------###
 
 ORTHOG_DIR = 0
@@ -52,6 +59,13 @@ ROUNDING_JSON = 2
 PLOT_MARGIN = 50
 NOISE = 5
 TIME_Z_MOVE = 0.15
+MAX_INTERCEPT_ITERATIONS = 32
+TRAJECTORY_CACHE_SIZE = 4096
+MAX_RUN_ATTEMPTS = 5
+"Stats holding the kinematics of the sliders, kept as arrays instead of going through json"
+KINEMATICS_STATS = ("slidersVelocity", "slidersAcceleration")
+"Stats holding a series of values of any length for each run"
+SERIES_STATS = ("timeMissedPicks", "timeMissedDrops", "dropsInRangePerT") + KINEMATICS_STATS
 
 
 class bcolors:
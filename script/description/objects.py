@@ -1,6 +1,11 @@
 import numpy as np
 from description.constants import *
-import description.config as cfg
+from description.transitions import (
+    SLIDER_NEXT_STATE,
+    SLIDER_EFFECTS,
+    RAIL_NEXT_STATE,
+    RAIL_REPEAT_STATE,
+)
 
 
 class Object:
@@ -29,12 +34,292 @@ class Object:
         self.deltaMove = [0] * DoF
 
 
+class ItemStore:
+    def __init__(self, direction, capacity=64):
+        """Struct-of-arrays storage for the items (picks or drops) of a conveyor. Each item is
+        referenced by a stable integer handle, which is its slot inside the columns.
+
+        Every item on a conveyor moves at the same speed, so the positions are stored in a frame
+        fixed to the belt. The position of an item is only computed when it is asked for, from
+        the distance travelled by the belt (beltOffset).
+
+        Items are stored by groups (a row of picks, or a row of packages), in the order they were
+        generated. Items never overtake each other, so the groups stay sorted along the conveyor
+        and leave it in the same order. This is used to find the items inside a window with two
+        binary searches. The slots of a group are put back in a free-slot list when it leaves the
+        conveyor.
+
+        The rails query the items through a snapshot of the positions, status, row and conveyor
+        IDs, built once after the conveyor moved and shared by every rail. Status changes made
+        through setStatus and remove are written in the snapshot as well.
+
+        Any change of the stored items, other than the belt moving, increments version. A copy of
+        the items can thus be reused as long as the version is the same.
+
+        Args:
+            direction (list): direction of the conveyor
+            capacity (int, optional): Initial number of slots. Doubled whenever it is reached.
+            Defaults to 64.
+        """
+        self.direction = np.array(direction)
+        "DoI : Direction of Interest index, and its sign"
+        self.DoI = direction[SAME_DIR]
+        self.signDoI = direction[self.DoI]
+        self.beltOffset = 0.0
+
+        self.beltPos = np.zeros((capacity, 2))
+        self.status = np.full(capacity, GONE, dtype=int)
+        self.rowID = np.zeros(capacity, dtype=int)
+        self.conveyorID = np.zeros(capacity, dtype=int)
+        self.packageID = np.zeros(capacity, dtype=int)
+        self.isActive = np.zeros(capacity, dtype=bool)
+        self.freeSlots = list(range(capacity - 1, -1, -1))
+
+        """Handles of each group, with the positions of its last and leading items along the
+        conveyor, in the belt frame"""
+        self.groups = []
+        self.groupsBounds = None
+
+        self.snapshot = None
+        self.snapshotIndex = None
+        self.version = 0
+
+    def __len__(self):
+        return len(self.isActive) - len(self.freeSlots)
+
+    def grow(self, nSlots):
+        """Extends every column to make room for at least nSlots more items.
+
+        Args:
+            nSlots (int): Number of free slots required
+        """
+        capacity = len(self.isActive)
+        newCapacity = capacity
+        while newCapacity - len(self) < nSlots:
+            newCapacity *= 2
+        extra = newCapacity - capacity
+
+        self.beltPos = np.concatenate((self.beltPos, np.zeros((extra, 2))))
+        self.status = np.concatenate((self.status, np.full(extra, GONE, dtype=int)))
+        self.rowID = np.concatenate((self.rowID, np.zeros(extra, dtype=int)))
+        self.conveyorID = np.concatenate((self.conveyorID, np.zeros(extra, dtype=int)))
+        self.packageID = np.concatenate((self.packageID, np.zeros(extra, dtype=int)))
+        self.isActive = np.concatenate((self.isActive, np.zeros(extra, dtype=bool)))
+        self.freeSlots = list(range(newCapacity - 1, capacity - 1, -1)) + self.freeSlots
+
+    def add(self, pos, status, rowID, conveyorID=0, packageID=0):
+        """Stores a new group of items.
+
+        Args:
+            pos (np.ndarray): (n, 2) current positions of the new items
+            status (int or np.ndarray): status of the new items
+            rowID (int or np.ndarray): ID of the row of each item
+            conveyorID (int or np.ndarray, optional): ID of the conveyor. Defaults to 0.
+            packageID (int or np.ndarray, optional): ID of the package. Defaults to 0.
+
+        Returns:
+            np.ndarray: handles of the new items
+        """
+        nItems = len(pos)
+        if len(self.freeSlots) < nItems:
+            self.grow(nItems)
+
+        handles = np.array([self.freeSlots.pop() for _ in range(nItems)], dtype=int)
+        self.beltPos[handles] = pos - self.beltOffset * self.direction
+        self.status[handles] = status
+        self.rowID[handles] = rowID
+        self.conveyorID[handles] = conveyorID
+        self.packageID[handles] = packageID
+        self.isActive[handles] = True
+
+        beltPosDoI = self.signDoI * self.beltPos[handles, self.DoI]
+        self.groups.append((handles, np.min(beltPosDoI), np.max(beltPosDoI)))
+        self.groupsBounds = None
+        self.snapshot = None
+        self.version += 1
+
+        return handles
+
+    def remove(self, handles):
+        """Removes the given items. Their slots are freed once their group leaves the conveyor.
+
+        Args:
+            handles (np.ndarray): handles of the items to delete
+        """
+        self.isActive[handles] = False
+        self.setStatus(handles, GONE)
+
+    def setStatus(self, handles, status):
+        """Changes the status of the given items, in the columns and in the snapshot.
+
+        Args:
+            handles (int or np.ndarray): handles of the items
+            status (int): new status
+        """
+        self.status[handles] = status
+        "The conveyors retire their items at each step, most often none"
+        if np.size(handles) > 0:
+            self.version += 1
+        if self.snapshot is not None:
+            index = self.snapshotIndex[handles]
+            self.snapshot["status"][index[index >= 0]] = status
+
+    def advance(self, distance, limit=None):
+        """Moves the belt, and retires the groups that have at least one item past the limit.
+
+        Args:
+            distance (float): distance travelled by the belt
+            limit (float, optional): position, along the direction of the conveyor, where the
+            items leave the workspace. Defaults to None, to only move the belt.
+
+        Returns:
+            np.ndarray: handles of the items of the groups that left the workspace
+        """
+        self.beltOffset += distance
+        self.snapshot = None
+
+        retired = []
+        while limit is not None and self.groups and self.groups[0][2] + self.beltOffset >= limit:
+            handles, _, _ = self.groups.pop(0)
+            retired.append(handles[self.isActive[handles]])
+            self.freeSlots.extend(handles.tolist())
+            self.groupsBounds = None
+            self.version += 1
+
+        if not retired:
+            return np.array([], dtype=int)
+        return np.concatenate(retired)
+
+    def positions(self, handles=None):
+        """Computes the current position of the given items.
+
+        Args:
+            handles (int or np.ndarray, optional): handles of the items. Defaults to every item.
+
+        Returns:
+            np.ndarray: positions of the items
+        """
+        if handles is None:
+            handles = self.handles()
+        return self.beltPos[handles] + self.beltOffset * self.direction
+
+    def handles(self):
+        """Returns the handles of every stored item, in their order of creation.
+
+        Returns:
+            np.ndarray: handles of the stored items
+        """
+        if not self.groups:
+            return np.array([], dtype=int)
+        handles = np.concatenate([group[0] for group in self.groups])
+        return handles[self.isActive[handles]]
+
+    def takeSnapshot(self):
+        """Gathers the columns of every stored item, in their order of creation, so the rails
+        don't have to rebuild them for each query."""
+        groupsHandles = [group[0][self.isActive[group[0]]] for group in self.groups]
+        groupsSize = [len(handles) for handles in groupsHandles]
+        handles = (
+            np.concatenate(groupsHandles) if groupsHandles else np.array([], dtype=int)
+        )
+
+        self.snapshot = {
+            "handles": handles,
+            "pos": self.positions(handles),
+            "status": self.status[handles],
+            "rowID": self.rowID[handles],
+            "conveyorID": self.conveyorID[handles],
+            "groupStart": np.concatenate(([0], np.cumsum(groupsSize, dtype=int))),
+        }
+        self.snapshotIndex = np.full(len(self.isActive), -1)
+        self.snapshotIndex[handles] = np.arange(len(handles))
+
+    def window(self, axis, minPos, maxPos):
+        """Finds the groups that overlap ]minPos, maxPos[ and returns their items, as a slice of
+        the snapshot. Only the groups are tested, the caller still has to check each item.
+
+        Args:
+            axis (int): index of the coordinate of the window
+            minPos (float): lower limit of the window
+            maxPos (float): upper limit of the window
+
+        Returns:
+            slice: the items of the groups inside the window, in the snapshot
+        """
+        if self.snapshot is None:
+            self.takeSnapshot()
+        groupStart = self.snapshot["groupStart"]
+
+        if axis != self.DoI:
+            "The groups are only sorted along the conveyor"
+            return slice(0, groupStart[-1])
+
+        if self.groupsBounds is None:
+            self.groupsBounds = np.array(
+                [[-group[1] for group in self.groups], [-group[2] for group in self.groups]]
+            ).reshape(2, -1)
+        lowest, lead = self.groupsBounds
+
+        "Window along the direction of the conveyor, in the belt frame"
+        if self.signDoI > 0:
+            windowMin, windowMax = minPos - self.beltOffset, maxPos - self.beltOffset
+        else:
+            windowMin, windowMax = -maxPos - self.beltOffset, -minPos - self.beltOffset
+
+        """The newest groups are the furthest behind, so the bounds are stored negated to be in
+        increasing order"""
+        first = np.searchsorted(lowest, -windowMax, side="right")
+        last = max(first, np.searchsorted(lead, -windowMin, side="left"))
+        return slice(groupStart[first], groupStart[last])
+
+
+class SliderStates:
+    def __init__(self, nSliders, DoF=3):
+        """Struct-of-arrays storage for the kinematic state of every slider, in [mm]. Row i holds
+        the slider of ID i. The position, velocity and acceleration are the three layers of the
+        same array, so that the state sampled from the trajectories, in [m], is converted in a
+        single operation. The Slider objects only hold views on their row.
+
+        Args:
+            nSliders (int): Number of sliders of the simulation
+            DoF (int, optional): Degree of freedom of the sliders. Defaults to 3.
+        """
+        self.kinematics = np.zeros((3, nSliders, DoF))
+        self.position = self.kinematics[0]
+        self.velocity = self.kinematics[1]
+        self.acceleration = self.kinematics[2]
+        self.target = np.zeros((nSliders, DoF))
+        "Target of the planned trajectories, in [m], as given to Ruckig"
+        self.plannedTarget = np.full((nSliders, DoF), np.nan)
+        "Kinematics sampled from the trajectories, in [m], before their conversion"
+        self.sampled = np.zeros((3, nSliders, DoF))
+
+        "Constant data of the sliders, used to check all of them at once"
+        self.rail = np.zeros(nSliders, dtype=int)
+        self.safetyMargin = np.zeros(nSliders)
+        self.workload = np.zeros(nSliders, dtype=int)
+
+
+def sliderStateView(column):
+    """Attribute of a slider that is a view on its row of a column of SliderStates. Assigning
+    fewer values than the degree of freedom only changes the first coordinates."""
+
+    def getter(self):
+        return getattr(self.states, column)[self.ID]
+
+    def setter(self, value):
+        getattr(self.states, column)[self.ID, : len(value)] = value
+
+    return property(getter, setter)
+
+
 class Conveyor(Object):
     # NOTE maybe change this so every conveyor is an object, instead of inside a list inside conveyor. makes it future proof
 
-    def __init__(self, params):
+    def __init__(self, params, sim):
         param = params["conveyor"]
         super().__init__(param, 2)
+        self.sim = sim
 
         self.deltaMove = [val * params["timeStep"] for val in param["speed"]]
         # Movement's parameters
@@ -52,14 +337,12 @@ class Conveyor(Object):
 
         self.listOutConveyor = []
         self.listInConveyor = []
-        self.listPicks = {}
-        self.listDrops = {}
-        self.listUnfilledPackages = []
+        self.picks = ItemStore(self.inDirection)
+        self.drops = ItemStore(self.outDirection)
         self.badProductRatio = param["badProductRatio"]
         self.nPickGenerations = self.nDropGenerations = 0
         self.pickWidth = params["target"]["width"]
         self.tOffset = None
-        self.rowInOffsetID = 0
         for i in range(param["nbInConveyor"]):
             temp = {
                 "stepStatus": "idle",  ## define the status in an external file
@@ -69,11 +352,9 @@ class Conveyor(Object):
                 "patternRowPos": None,
                 "patternIDs": None,
             }
-            self.rowInOffsetID += temp["itemsPerRow"]
             self.listInConveyor.append(temp)
 
         self.errorMargin = param["errorMargin"]
-        self.packageOffsetID = 0
         for i in range(param["nbOutConveyor"]):
             temp = {
                 "stepStatus": "idle",  ## define the status in an external file
@@ -85,7 +366,6 @@ class Conveyor(Object):
                 "patternRowIDs": None,
             }
             self.listOutConveyor.append(temp)
-            self.packageOffsetID += temp["itemsPerRow"] * param["nPackagesRow"]
         self.nPackagesRow = param["nPackagesRow"]
         self.packagesRowSplitting = param["packagesRowSplitting"]
         self.packagesRowSplitSpacing = param["packagesRowSplitSpacing"]
@@ -113,25 +393,26 @@ class Conveyor(Object):
             startPos = conveyor["endPos"] - DoI * (self.length + offsetDistance)
             itemsPerRow = conveyor["itemsPerRow"]
             rowPosPattern = conveyor["patternRowPos"]
-            newPos = (
-                rowPosPattern
-                + startPos
-                + np.random.normal(scale=np.sqrt(0.5), size=(itemsPerRow, 2))
-            )
+            if self.sim.pickStream is not None:
+                "Replays the pre-generated products"
+                if self.nPickGenerations >= len(self.sim.pickStream[idx]):
+                    raise RuntimeError(
+                        f"The pick stream only holds {len(self.sim.pickStream[idx])} rows,"
+                        + " it is too short for the duration of the run"
+                    )
+                product = self.sim.pickStream[idx][self.nPickGenerations]
+                noise = product[:, :2]
+                badCondition = product[:, 2] > 0
+            else:
+                noise = self.sim.rng.normal(scale=np.sqrt(0.5), size=(itemsPerRow, 2))
 
-            "Determines the quality of the products."
-            badCondition = np.random.random_sample(itemsPerRow) < self.badProductRatio
-            newStatus = np.where(badCondition, BAD, FREE).tolist()
+                "Determines the quality of the products."
+                badCondition = self.sim.rng.random_sample(itemsPerRow) < self.badProductRatio
+            newPos = rowPosPattern + startPos + noise
+            newStatus = np.where(badCondition, BAD, FREE)
 
             "Generate new entries for each picks"
-            for i in range(len(rowPosPattern)):
-                newID = self.nPickGenerations * self.rowInOffsetID + i
-                self.listPicks[newID] = {
-                    "pos": newPos[i],
-                    "status": newStatus[i],
-                    "rowID": self.nPickGenerations,
-                    "conveyorID": idx,
-                }
+            self.picks.add(newPos, newStatus, self.nPickGenerations, conveyorID=idx)
 
         self.nPickGenerations += 1
 
@@ -150,16 +431,13 @@ class Conveyor(Object):
             )
             # * pourquoi il y a extra dist encore ici
             "Generate new entries for each drops"
-            for i in range(len(conveyor["patternPackagesPos"])):
-                newID = self.nDropGenerations * self.packageOffsetID + i
-                self.listDrops[newID] = {
-                    "pos": conveyor["patternPackagesPos"][i] + startPos,
-                    "status": NORMAL,
-                    "packageID": self.nDropGenerations * conveyor["newIDOffset"]
-                    + conveyor["patternPackagesIDs"][i],
-                    "rowID": conveyor["patternRowIDs"][i]
-                    + self.nDropGenerations * self.nPackagesRow,
-                }
+            self.drops.add(
+                conveyor["patternPackagesPos"] + startPos,
+                NORMAL,
+                conveyor["patternRowIDs"] + self.nDropGenerations * self.nPackagesRow,
+                packageID=self.nDropGenerations * conveyor["newIDOffset"]
+                + conveyor["patternPackagesIDs"],
+            )
 
         self.nDropGenerations += 1
 
@@ -231,12 +509,14 @@ class Conveyor(Object):
         conveyor["patternRowIDs"] = np.digitize(packagePattern[:, DoI[SAME_DIR]], xPos)
         conveyor["newIDOffset"] = newIDOffset
 
-    def moveConveyors(self, t: int, start=False):
+    def moveConveyors(self, t: int, start=False, maintain=True):
         """Computes the delta position between the last and the current frame, and apply it to
         the list of picks and drops.
 
         Args:
             t (int): current time frame of the simulation
+            maintain (bool, optional): Whether new rows are generated and the ones that left the
+            workspace are deleted during this frame. The belts move in any case. Defaults to True.
         """
         " Computes an offset in time, to make sure both feeds meet at an adequate timing"
         if self.tOffset is None:
@@ -257,9 +537,10 @@ class Conveyor(Object):
             distanceSinceLastGen = (
                 self.new_position[0] - self.inRowSpacing * self.nPickGenerations
             )
-            if distanceSinceLastGen > 0:
+            while maintain and distanceSinceLastGen > 0:
                 self.generatePicks(distanceSinceLastGen)
-            self.movePicks(t, self.deltaMove[0] * np.array(self.inDirection))
+                distanceSinceLastGen -= self.inRowSpacing
+            self.movePicks(t, self.deltaMove[0], maintain)
 
         if not (t < self.tOffset > 0):
             "Moves the drops if the tOffset is respected, and generates new ones when needed"
@@ -272,90 +553,68 @@ class Conveyor(Object):
                 )
                 * self.nDropGenerations
             )
-            if distanceSinceLastGen > 0:
+            while maintain and distanceSinceLastGen > 0:
                 self.generateDrops(distanceSinceLastGen)
-            self.moveDrops(t, self.deltaMove[1] * np.array(self.outDirection))
+                distanceSinceLastGen -= (
+                    self.packagesRowSpacing * (self.nPackagesRow)
+                    + self.packagesExtraSpacing
+                )
+            self.moveDrops(t, self.deltaMove[1], maintain)
 
         if (
             self.new_position[1] > self.length
-            and cfg.listStat[-1]["startRecordingTime"] == 0
+            and self.sim.stats["startRecordingTime"] == 0
         ):
             """Register the time a full length has been reached with packages. Used to track stats
             and ignore the launch offset in performance"""
-            cfg.listStat[-1]["startRecordingTime"] = t
+            self.sim.stats["startRecordingTime"] = t
         if (
             self.new_position[0] > self.length
-            and cfg.listStat[-1]["startRecordingTime_2"] == 0
+            and self.sim.stats["startRecordingTime_2"] == 0
         ):
             """Register the time a full length has been reached with packages. Used to track stats
             and ignore the launch offset in performance"""
-            cfg.listStat[-1]["startRecordingTime_2"] = t
+            self.sim.stats["startRecordingTime_2"] = t
 
-    def movePicks(self, t, dist):
-        """Checks if each pick is still inside the workspace, deletes the ones that are not
-        and apply the deltaMove to the ones that are"""
-        pickToDelete = []
-        idToDel = []
+    def movePicks(self, t, dist, maintain=True):
+        """Moves the picks by the given distance, and deletes the rows that have left the
+        workspace, if the conveyor is maintained during this frame"""
         DoI = self.inDirection[SAME_DIR]
         signDoI = self.inDirection[DoI]
-        posLimit1 = self.listInConveyor[-1]["endPos"][DoI]
-        posLimit2 = self.listInConveyor[-1]["endPos"][DoI] - self.length * signDoI
-        minPos = min(posLimit1, posLimit2)
-        maxPos = max(posLimit1, posLimit2)
-
-        for pickID in self.listPicks:
-            self.listPicks[pickID]["pos"] += dist
-            pos = self.listPicks[pickID]["pos"]
-            rowID = self.listPicks[pickID]["rowID"]
-            condMax = maxPos + BORDER_TOLERANCE
-            condMin = minPos - BORDER_TOLERANCE
-
-            if not (condMin < pos[DoI] < condMax) and rowID not in idToDel:
-                idToDel.append(rowID)
-
-            if rowID in idToDel:
-                pickToDelete.append(pickID)
-                if self.listPicks[pickID]["status"] not in (GONE, BAD):
-                    cfg.listStat[-1]["missedPicks"] += 1
-                    cfg.listStat[-1]["timeMissedPicks"].append(t)
+        posLimit = self.listInConveyor[-1]["endPos"][DoI] * signDoI + BORDER_TOLERANCE
+
+        pickToDelete = self.picks.advance(dist, posLimit if maintain else None)
+
+        status = self.picks.status[pickToDelete]
+        nMissed = int(np.count_nonzero((status != GONE) & (status != BAD)))
+        self.sim.stats["missedPicks"] += nMissed
+        self.sim.stats["timeMissedPicks"].extend([t] * nMissed)
 
         self.deletePick(pickToDelete)
 
-    def moveDrops(self, t, dist):
-        """Checks if each packages is still inside the workspace, deletes the ones that are not
-        and apply the deltaMove to the ones that are"""
+    def moveDrops(self, t, dist, maintain=True):
+        """Moves the drops by the given distance, and deletes the packages that have left the
+        workspace, if the conveyor is maintained during this frame"""
         DoI = self.outDirection[SAME_DIR]
         signDoI = self.outDirection[DoI]
-        posLimit1 = self.listOutConveyor[-1]["endPos"][DoI]
-        posLimit2 = self.listOutConveyor[-1]["endPos"][DoI] - self.length * signDoI
-        minPos = min(posLimit1, posLimit2)
-        maxPos = max(posLimit1, posLimit2)
-        dropToDelete = []
-        idToDel = []
-        for dropID in (
-            reversed(list(self.listDrops.keys())) if signDoI < 0 else self.listDrops
-        ):
-            self.listDrops[dropID]["pos"] += dist
-            pos = self.listDrops[dropID]["pos"]
-            # NOTE: The + 1 is because even if a position is 1000, there is a small imprecision
-            # NOTE: making it balance around that value
-            condMax = maxPos + (2 * self.packagesExtraSpacing + 1)
-            condMin = minPos - (self.packagesExtraSpacing + 1)
-            packageID = self.listDrops[dropID]["packageID"]
-
-            if not (condMin < pos[DoI] < condMax) and packageID not in idToDel:
-                idToDel.append(packageID)
-                cfg.listStat[-1]["totalPackages"] += 1
-
-            if packageID in idToDel:
-                dropToDelete.append(dropID)
-                if self.listDrops[dropID]["status"] != DONE:
-                    cfg.listStat[-1]["missedDrops"] += 1
-                    cfg.listStat[-1]["timeMissedDrops"].append(t)
-                    if packageID not in self.listUnfilledPackages:
-                        self.listUnfilledPackages.append(packageID)
-                        cfg.listStat[-1]["unfilledPackages"] += 1
-                        # cfg.listStat[-1]["totalPackages"] += 1
+        # NOTE: The + 1 is because even if a position is 1000, there is a small imprecision
+        # NOTE: making it balance around that value
+        if signDoI > 0:
+            extraDist = 2 * self.packagesExtraSpacing + 1
+        else:
+            extraDist = self.packagesExtraSpacing + 1
+        posLimit = self.listOutConveyor[-1]["endPos"][DoI] * signDoI + extraDist
+
+        dropToDelete = self.drops.advance(dist, posLimit if maintain else None)
+
+        isMissed = self.drops.status[dropToDelete] != DONE
+        nMissed = int(np.count_nonzero(isMissed))
+        packagesID = np.unique(self.drops.packageID[dropToDelete])
+        unfilledPackages = np.unique(self.drops.packageID[dropToDelete[isMissed]])
+        self.sim.stats["totalPackages"] += len(packagesID)
+        self.sim.stats["missedDrops"] += nMissed
+        self.sim.stats["timeMissedDrops"].extend([t] * nMissed)
+        self.sim.stats["unfilledPackages"] += len(unfilledPackages)
 
         self.deleteDrop(dropToDelete, endCourse=True)
 
@@ -363,54 +622,49 @@ class Conveyor(Object):
         """Deletes the desired picks from the list of picks
 
         Args:
-            pickID (int or list[int]): the ID of the picks to delete
+            pickID (int or list[int]): the handle of the picks to delete
             endCourse (bool, optional): Wether this is called because we are at the end of the
             conveyor line or no. This is relevant for the stats. Defaults to False.
         """
-
-        def _deletePick(pickID):
-            if self.listPicks[pickID]["status"] != BAD:
-                cfg.listStat[-1]["totalPicks"] += 1
-            del self.listPicks[pickID]
-
-        if isinstance(pickID, list):
-            for ID in pickID:
-                _deletePick(ID)
-        else:
-            _deletePick(pickID)
+        handles = np.atleast_1d(np.asarray(pickID, dtype=int))
+        self.sim.stats["totalPicks"] += int(
+            np.count_nonzero(self.picks.status[handles] != BAD)
+        )
+        self.picks.remove(handles)
 
     def deleteDrop(self, dropID, endCourse=False):
         """Deletes the desired drops from the list of drops
 
         Args:
-            dropID (int or list[int]): the ID of the drops to delete
+            dropID (int or list[int]): the handle of the drops to delete
             endCourse (bool, optional): Wether this is called because we are at the end of the
             conveyor line or no. This is relevant for the stats, and because filled drops are
             still shown, until they leave the conveyors. Defaults to False.
         """
+        handles = np.atleast_1d(np.asarray(dropID, dtype=int))
+        if endCourse:
+            self.drops.remove(handles)
+            self.sim.stats["totalDrops"] += len(handles)
 
-        def _deleteDrop(dropID, endCourse=False):
-            if endCourse:
-                del self.listDrops[dropID]
-                cfg.listStat[-1]["totalDrops"] += 1
-
-            else:
-                self.listDrops[dropID]["status"] = DONE
-
-        if isinstance(dropID, list):
-            for ID in dropID:
-                _deleteDrop(ID, endCourse)
         else:
-            _deleteDrop(dropID, endCourse)
+            self.drops.setStatus(handles, DONE)
 
 
 class Slider(Object):
-    def __init__(self, params, ID):
+    position = sliderStateView("position")
+    currentVelocity = sliderStateView("velocity")
+    currentAcceleration = sliderStateView("acceleration")
+    targetPosition = sliderStateView("target")
+
+    def __init__(self, params, ID, sim):
         slider = params["slider"]
+        "The kinematic state is stored in the simulation, and must be reachable from the start"
+        self.sim = sim
+        self.states = sim.sliderStates
+        self.ID = ID
         super().__init__(slider, 3)
         self.direction = params["beam"]["direction"]
         self.transformProfile()
-        self.ID = ID
         # TODO  Maybe we can do without. it's used once in plotter.py
         self.railPos = None
         # TODO  Maybe we can do without. it's used once in plotter.py
@@ -423,7 +677,7 @@ class Slider(Object):
         self.armWidth = slider["armWidth"]
 
         self.trackedTargetID = None
-        self.safetyMargin = slider["safetyMargin"]
+        self.safetyMargin = self.states.safetyMargin[ID] = slider["safetyMargin"]
         self.minPosition = [0, slider["reachOffset"], 0]
         self.maxPosition = np.concatenate(
             (
@@ -505,65 +759,57 @@ class Slider(Object):
         except:
             pass
 
-    def nextSliderState(self, conveyors: Conveyor, railState: int):
-        """State cycles contains the incoming state on the first column, and the upcoming state in
-        the second column, if the condition(if there is one) is met."""
-        if railState == PICKING:
-            stateCycle = np.array(
-                [
-                    [PICKING, Z_MVMT],  ## different from the picking, here
-                    [Z_MVMT, IDLE],
-                    [SKIPPED, SKIPPED],
-                    [SKIP_N_WAIT, SKIP_N_WAIT],
-                    [WAITING, IDLE],
-                ]
-            )
-            deleteTarget = conveyors.deletePick
-        elif railState == PLACING:
-            stateCycle = np.array(
-                [
-                    [PLACING, Z_MVMT],
-                    [Z_MVMT, IDLE],
-                    [SKIPPED, IDLE],  ## different from the picking, here
-                    [SKIP_N_WAIT, SKIP_N_WAIT],
-                    [WAITING, IDLE],
-                ]
-            )
-            deleteTarget = conveyors.deleteDrop
-        else:
-            return
-
-        def nextState(currentState):
-            return int(stateCycle[:, 1][np.isin(stateCycle[:, 0], currentState)][0])
-
-        if self.status in (PICKING, PLACING):
-            self.start_z_move = cfg.t
-            deleteTarget(self.trackedTargetID)
-            self.trackedTargetID = None
-
-            # if railState == PICKING:
-            # TODO modify this for 2 states input
-            # self.trackedTargetID = (
-            #     NORMAL if beams.workspaceSide[railID // 2] == 0 else NORMAL
-            # )
-            if railState == PLACING:
 
-                "Register that a Pick&Place has been done"
-                cfg.listStat[-1]["pickPerSlider"][self.ID] += 1
-
-            self.status = nextState(self.status)
-
-        elif self.status == Z_MVMT:
-            if (cfg.t - self.start_z_move) * cfg.dt > TIME_Z_MOVE:
-                self.status = nextState(self.status)
+def nextSlidersStates(
+    sliders: list[Slider], railStates: np.ndarray, conveyors: Conveyor
+) -> None:
+    """Moves the given sliders, which reached their target position, to their next state. The
+    next states and the side effects are looked up in the transition tables for all of the
+    sliders at once. Only the side effects are applied slider by slider.
+
+    Args:
+        sliders (list[Slider]): Sliders that reached their target position
+        railStates (np.ndarray): State of the rail of each slider
+        conveyors (Conveyor): Conveyor object, holding the targets to delete
+    """
+    if not sliders:
+        return
+    sim = sliders[0].sim
+    status = np.array([s.status for s in sliders])
+    railStates = railStates.astype(int)
+    nextStatus = SLIDER_NEXT_STATE[railStates, status]
+    effects = SLIDER_EFFECTS[railStates, status]
+
+    isWaiting = (effects & WAIT_Z_TIMER) > 0
+    if isWaiting.any():
+        "The Z movement lasts TIME_Z_MOVE before the slider can move again"
+        zMoveStart = np.array([s.start_z_move for s in sliders])
+        isZMoveOver = (sim.t - zMoveStart) * sim.dt > TIME_Z_MOVE
+        nextStatus = np.where(isWaiting & ~isZMoveOver, status, nextStatus)
+
+    for k in np.flatnonzero(effects & (DELETE_TARGET | COUNT_PICK | START_Z_TIMER)):
+        slider = sliders[k]
+        if effects[k] & START_Z_TIMER:
+            slider.start_z_move = sim.t
+        if effects[k] & DELETE_TARGET:
+            if railStates[k] == PICKING:
+                conveyors.deletePick(slider.trackedTargetID)
+            else:
+                conveyors.deleteDrop(slider.trackedTargetID)
+            slider.trackedTargetID = None
+        if effects[k] & COUNT_PICK:
+            "Register that a Pick&Place has been done"
+            sim.stats["pickPerSlider"][slider.ID] += 1
 
-        elif self.status in (stateCycle[:, 0]):
-            self.status = nextState(self.status)
+    sim.stats["sliderTransitions"] += int(np.count_nonzero(nextStatus != status))
+    for slider, state in zip(sliders, nextStatus.tolist()):
+        slider.status = state
 
 
 class Beam:
-    def __init__(self, params):
+    def __init__(self, params, sim):
         beam = params["beam"]
+        self.sim = sim
         self.width = beam["width"]
         self.length = beam["length"]
         self.spacing = beam["spacing"]
@@ -580,27 +826,25 @@ class Beam:
 
     def nextRailState(self, rail: list[Slider], conveyors: Conveyor):
         railID = rail[0].ID // 2
-        if self.railStatus[railID] == PICKING:
-            nextState = CAN_PLACE
-            repeatState = CAN_PICK
-            inOrOut = "out"  # for the next preMove (with slider.nextState)
-        elif self.railStatus[railID] == PLACING:
-            nextState = CAN_PICK
-            repeatState = CAN_PLACE
-            inOrOut = "in"  # for the next preMove (with slider.nextState)
-        else:
+        railState = int(self.railStatus[railID])
+        nextState = RAIL_NEXT_STATE[railState]
+        if nextState == railState:
             return
+        repeatState = RAIL_REPEAT_STATE[railState]
+        "Conveyor of the next preMove"
+        inOrOut = "out" if nextState == CAN_PLACE else "in"
+        self.sim.stats["railTransitions"] += 1
 
         if SKIP_N_WAIT in (rail[0].status, rail[1].status):
             self.railStatus[railID] = repeatState
 
             # "If the state bouncing argument is enabled, make the outer beams bounce states"
-            # if cfg.stateBouncing and rail[0].ID // 4 in (0, len(self.listBeamPos) - 1):
+            # if self.sim.stateBouncing and rail[0].ID // 4 in (0, len(self.listBeamPos) - 1):
             #     "State bouncing is enabled by giving an initial bouncing state"
             #     self.bouncingInitState[railID] = repeatState
                 
             "If the state bouncing argument is enabled, make the beams bounce states"
-            if cfg.stateBouncing:
+            if self.sim.stateBouncing:
                 "State bouncing is enabled by giving an initial bouncing state"
                 self.bouncingInitState[railID] = repeatState
 
@@ -614,11 +858,11 @@ class Beam:
         else:
             self.railStatus[railID] = nextState
             # "If the premove argument is enabled, make the outer beams pre move"
-            # if cfg.preMove and rail[0].ID // 4 in (0, len(self.listBeamPos) - 1):
+            # if self.sim.preMove and rail[0].ID // 4 in (0, len(self.listBeamPos) - 1):
             #     self.preMove(rail, conveyors, self.workspaceSide[railID // 2], inOrOut)
 
             "If the premove argument is enabled, make the beams pre move"
-            if cfg.preMove :
+            if self.sim.preMove :
                 self.preMove(rail, conveyors, self.workspaceSide[railID // 2], inOrOut)
 
     def preMove(
@@ -648,9 +892,19 @@ class Beam:
         sliders[1].targetPosition[:2] = coord12 + coord2
 
 
-def defineObjects(params):
-    conveyors = Conveyor(params)
-    beams = Beam(params)
+def defineObjects(params, sim):
+    """Creates the objects of a simulation. They keep a reference to it, to reach its clock,
+    its settings, its random generator and its stats.
+
+    Args:
+        params (dict): description of the parameters used for the simulation
+        sim (Simulation): Simulation the objects belong to
+
+    Returns:
+        tuple[list[list[Slider]], Conveyor, Beam]: The rails of sliders, the conveyors and the beams
+    """
+    conveyors = Conveyor(params, sim)
+    beams = Beam(params, sim)
     sliders = []
 
     def defineRail(side: int):
@@ -660,7 +914,8 @@ def defineObjects(params):
 
         for j in range(params["slider"]["slidersPerRail"]):
             sliderID = 4 * i + 2 * ((side + 1) // 2) + j
-            tempSliders.append(Slider(params, ID=sliderID))
+            tempSliders.append(Slider(params, ID=sliderID, sim=sim))
+            sim.sliderStates.rail[sliderID] = len(sliders)
             beamPos = beams.listBeamPos[i]
             halfWidth = beams.width / 2
             # TODO change _offset to constants with a name
@@ -0,0 +1,118 @@
+import numpy as np
+
+from description.constants import *
+
+"""Transitions of a slider that reached its target position, depending on the state of its rail:
+(rail state, slider state, next slider state, side effects). A slider in any other state, or on
+a rail in any other state, keeps its state."""
+SLIDER_TRANSITIONS = [
+    (PICKING, PICKING, Z_MVMT, DELETE_TARGET | START_Z_TIMER),
+    (PICKING, Z_MVMT, IDLE, WAIT_Z_TIMER),
+    (PICKING, SKIPPED, SKIPPED, 0),
+    (PICKING, SKIP_N_WAIT, SKIP_N_WAIT, 0),
+    (PICKING, WAITING, IDLE, 0),
+    (PLACING, PLACING, Z_MVMT, DELETE_TARGET | START_Z_TIMER | COUNT_PICK),
+    (PLACING, Z_MVMT, IDLE, WAIT_Z_TIMER),
+    (PLACING, SKIPPED, IDLE, 0),
+    (PLACING, SKIP_N_WAIT, SKIP_N_WAIT, 0),
+    (PLACING, WAITING, IDLE, 0),
+]
+
+"""Transitions of a rail whose sliders are all done: (rail state, next state, repeated state).
+The rail goes to the next state, or stays in the repeated one if one of its sliders skipped
+its target and waits for the other one."""
+RAIL_TRANSITIONS = [
+    (PICKING, CAN_PLACE, CAN_PICK),
+    (PLACING, CAN_PICK, CAN_PLACE),
+]
+
+RAIL_STATE_NAMES = {
+    CAN_PICK: "CAN_PICK",
+    PICKING: "PICKING",
+    CAN_PLACE: "CAN_PLACE",
+    PLACING: "PLACING",
+}
+SLIDER_STATE_NAMES = {
+    IDLE: "IDLE",
+    TRAVELING: "TRAVELING",
+    SKIPPED: "SKIPPED",
+    SKIP_N_WAIT: "SKIP_N_WAIT",
+    PICKING: "PICKING",
+    PLACING: "PLACING",
+    WAITING: "WAITING",
+    Z_MVMT: "Z_MVMT",
+}
+EFFECT_NAMES = {
+    DELETE_TARGET: "deleteTarget",
+    COUNT_PICK: "countPick",
+    START_Z_TIMER: "startZTimer",
+    WAIT_Z_TIMER: "waitZTimer",
+}
+
+
+def compileTransitions():
+    """Compiles the transitions into integer tables, indexed directly by the state codes, so that
+    they can be looked up for many sliders or rails at once. States without a transition lead to
+    themselves, without any side effect.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Next slider state and side effects,
+        indexed by [rail state, slider state], then next and repeated rail state, indexed by the
+        rail state.
+    """
+    nStates = max(*RAIL_STATE_NAMES, *SLIDER_STATE_NAMES) + 1
+    sliderNextState = np.tile(np.arange(nStates), (nStates, 1))
+    sliderEffects = np.zeros((nStates, nStates), dtype=int)
+    for railState, state, nextState, effects in SLIDER_TRANSITIONS:
+        sliderNextState[railState, state] = nextState
+        sliderEffects[railState, state] = effects
+
+    railNextState = np.arange(nStates)
+    railRepeatState = np.arange(nStates)
+    for railState, nextState, repeatState in RAIL_TRANSITIONS:
+        railNextState[railState] = nextState
+        railRepeatState[railState] = repeatState
+
+    return sliderNextState, sliderEffects, railNextState, railRepeatState
+
+
+(
+    SLIDER_NEXT_STATE,
+    SLIDER_EFFECTS,
+    RAIL_NEXT_STATE,
+    RAIL_REPEAT_STATE,
+) = compileTransitions()
+
+
+def dumpTransitions() -> str:
+    """Describes every transition of the compiled tables, for inspection.
+
+    Returns:
+        str: One line per transition, with the names of the states and of the side effects
+    """
+    lines = ["rail state | slider state -> next slider state [side effects]"]
+    for railState, railName in RAIL_STATE_NAMES.items():
+        for state, name in SLIDER_STATE_NAMES.items():
+            nextState = SLIDER_NEXT_STATE[railState, state]
+            effects = SLIDER_EFFECTS[railState, state]
+            if nextState == state and effects == 0:
+                continue
+            effectNames = [n for flag, n in EFFECT_NAMES.items() if effects & flag]
+            lines.append(
+                f"{railName} | {name} -> {SLIDER_STATE_NAMES[nextState]} "
+                + f"[{', '.join(effectNames)}]"
+            )
+
+    lines.append("")
+    lines.append("rail state -> next rail state (repeated rail state)")
+    for railState, railName in RAIL_STATE_NAMES.items():
+        if RAIL_NEXT_STATE[railState] != railState:
+            lines.append(
+                f"{railName} -> {RAIL_STATE_NAMES[RAIL_NEXT_STATE[railState]]} "
+                + f"({RAIL_STATE_NAMES[RAIL_REPEAT_STATE[railState]]})"
+            )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    print(dumpTransitions())
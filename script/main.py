@@ -3,117 +3,52 @@ import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation, PillowWriter
 
 from time import time
+import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import copy
 from description.objects import *
 from description.constants import *
-from scripts.json_handler import writeHistory, saveHistory, saveStat
-from scripts.trajectoryControl import setExtraLookingRange
+from scripts.json_handler import (
+    saveHistory,
+    saveStat,
+    appendRunLog,
+    loadRunLog,
+    hasRunLog,
+    saveSweep,
+    loadSweep,
+    getPickStream,
+)
+from scripts.simulation import Simulation
 
-import scripts.pickControl as pick
-import scripts.dropControl as drop
-import scripts.compute_trajectory as move
 import scripts.plotter as plotter
 import description.config as cfg
 
 
-def initRuckig(*args: Object):
-    for obj in args:
-        if isinstance(obj, list):
-            initRuckig(*obj)
-        else:
-            move.initRuckig(obj)
-
-
-def updateConveyor(conveyors: Conveyor):
-    pass
-
-
-def updateSliders(
-    sliders: list[list[Slider]], conveyors: Conveyor, beams: Beam
-) -> None:
-    """Update the state of the sliders.
-
-    Args:
-        sliders (list[list[Slider]]): list of the rails, which is a list of sliders
-        conveyors (Conveyor): Conveyor object containing information about the conveyors.
-        beams (Beam): Beam object containing beam information.
-    """
-    for railID, rail in enumerate(sliders):
-        isDone = True
-
-        for s in rail:
-            move.updateRuckig(s)
-
-            if beams.railStatus[railID] == PICKING and s.status == PICKING:
-                errorPos = np.array(s.position[:-1]) - np.array(
-                    conveyors.listPicks[s.trackedTargetID]["pos"]
-                )
-            elif beams.railStatus[railID] == PLACING and s.status == PLACING:
-                errorPos = np.array(s.position[:-1]) - np.array(
-                    conveyors.listDrops[s.trackedTargetID]["pos"]
-                )
-            else:
-                errorPos = np.array(s.position[:-1]) - np.array(s.targetPosition[:2])
-
-            if np.all(np.abs(errorPos) < conveyors.errorMargin) and np.all(
-                np.abs(s.currentVelocity) <= s.safetyMargin
-            ):
-                "If the position has been reached, changed the slider's state."
-                s.nextSliderState(conveyors, beams.railStatus[railID])
-
-                if s.status == "Z_MVMT":
-                    "Record the number of timesteps where a slider is moving"
-                    cfg.listStat[-1]["workload"][s.ID] += 1
-            else:
-                "Record the number of timesteps where a slider is moving"
-                cfg.listStat[-1]["workload"][s.ID] += 1
-
-            if s.status in (Z_MVMT, PLACING, PICKING):
-                isDone = False
-
-        if isDone:
-            beams.nextRailState(rail, conveyors)
-
-
 def update(
-    sliders: list[list[Slider]],
-    conveyors: Conveyor,
-    beams: Beam,
+    sim: Simulation,
     plotEvery: int,
     max_time: int,
+    isPlottingLive: bool,
     isGifSaved: bool,
-    isJsonSaved: bool,
     plot_elements=None,
     ax=None,
     fig_dim=None,
-    frames=None,
 ):
-    global t, history, running
     for _ in range(plotEvery):
-        if t * cfg.dt >= max_time:
+        if sim.t * sim.dt >= max_time:
             break
-        # if (t*cfg.dt) % 5 == 0:
-        #     print(f"{bcolors.OKBLUE} Starting second {t*cfg.dt} {bcolors.ENDC}")
-        # print("\r" + f"{LINE_START}Time: {t*cfg.dt:.2f}", end="")
-
-        # cfg.listStat[-1]["dropsInRangePerT"].append(0)
-        # findDropsInRange(conveyors, beams, sliders[-1])
-        # findDropsInRange(conveyors, beams, sliders[-2])
-
-        "Assign picks to sliders"
-        pick.assignPicks(sliders, conveyors, beams)
-        drop.assignDrops(sliders, conveyors, beams)
-
-        "Update map"
-        conveyors.moveConveyors(t)
-        updateSliders(sliders, conveyors, beams)
-        cfg.recordSlidersKinematics(sliders)
-        if isJsonSaved:
-            history = writeHistory(history, sliders, conveyors, beams, t)
-        t += 1
-        cfg.t = t
+        # if (sim.t*sim.dt) % 5 == 0:
+        #     print(f"{bcolors.OKBLUE} Starting second {sim.t*sim.dt} {bcolors.ENDC}")
+        # print("\r" + f"{LINE_START}Time: {sim.t*sim.dt:.2f}", end="")
+
+        # sim.stats["dropsInRangePerT"].append(0)
+        # findDropsInRange(sim.conveyors, sim.beams, sim.sliders[-1])
+        # findDropsInRange(sim.conveyors, sim.beams, sim.sliders[-2])
+        sim.step()
+
     if isGifSaved:
         "Update plot elements"
-        updated_artists = plotter.updatePlot(conveyors, sliders, plot_elements)
+        updated_artists = plotter.updatePlot(sim.conveyors, sim.sliders, plot_elements)
 
         "Return updated elements for blitting"
         return updated_artists
@@ -121,33 +56,115 @@ def update(
     elif isPlottingLive:
 
         ax.cla()
-        plotter.initializePlot(conveyors, sliders, beams, params, ax, isGifSaved)
+        plotter.initializePlot(
+            sim.conveyors, sim.sliders, sim.beams, sim.params, ax, isGifSaved
+        )
 
         ax.set_xlim(-PLOT_MARGIN, fig_dim[0])
         ax.set_ylim(fig_dim[1], -PLOT_MARGIN)
-        plt.pause(cfg.dt * plotEvery)
+        plt.pause(sim.dt * plotEvery)
+
+
+def runTask(task: dict) -> tuple[dict, list, bool]:
+    """Runs one simulation of the sweep, with its own stats and seed. If the simulation fails, it
+    is run again with a new seed, spawned from the previous one, up to MAX_RUN_ATTEMPTS times.
+
+    Args:
+        task (dict): Description of the run: its indices in the sweep, its parameters and its seed
+
+    Returns:
+        tuple[dict, list, bool]: The stats of the run, None if it failed MAX_RUN_ATTEMPTS times,
+        the errors met, and whether the user interrupted the simulation.
+    """
+    i, j, nRuns = task["i"], task["j"], task["nRuns"]
+    c, end = bcolors.HEADER, bcolors.ENDC
+    cfg.listError.clear()
+
+    print(SEPARATOR)
+    print(SEPARATOR2)
+    seed = task["seed"]
+    for _ in range(MAX_RUN_ATTEMPTS):
+        print(
+            f"{LINE_START}{c}Starting run {task['runID']} / {task['nTasks']}"
+            + f" [{task['runID'] / task['nTasks']*100:.2f}%]{end}"
+        )
+        if not task["singleRun"]:
+            print(f"{LINE_START}{c}Using parameters {task['variedParam']}{end}")
+
+        sim = Simulation(
+            task["params"],
+            task["settings"],
+            seed,
+            task["pickStream"],
+            task["isJsonSaved"],
+        )
+        if task["paramName"] is not None:
+            sim.stats[task["paramName"]] = task["variedParam"]
+
+        err = initCode(
+            sim,
+            task["isPlottingLive"],
+            task["isGifSaved"],
+            f"{task['saveName']}_{i}" if nRuns > 1 else task["saveName"],
+        )
+        if task["singleRun"]:
+            err = None
+        if err is None:
+            print(SEPARATOR2)
+            return sim.results(), list(cfg.listError), False
+        elif err == "interupt":
+            return sim.results(), list(cfg.listError), True
+        else:
+            seed = sim.stats["seed"]
+            cfg.newErrEntry(err, seed, i, j, task["paramName"], task["variedParam"])
+            seed = cfg.spawnSeeds(seed, 1)[0]
+
+    "The run kept failing. It is left out of the stats, and will be run again if resumed"
+    return None, list(cfg.listError), False
+
+
+def saveHistoryAfterStop(sim: Simulation, saveName: str):
+    """Saves the history of a simulation that was interrupted or failed. An error of the save,
+    such as the one of a broken writer thread, is only printed, so that the run is still
+    reported as interrupted or retried with a new seed, like any failed run.
+
+    Args:
+        sim (Simulation): The stopped simulation
+        saveName (str): Name under which to save the history
+    """
+    try:
+        saveHistory(sim.history, [sim.results()], sim.params, saveName)
+    except Exception as saveError:
+        c, end = bcolors.WARNING, bcolors.ENDC
+        print(f"{LINE_START}{c}The history could not be saved: {saveError}{end}")
 
 
 def initCode(
-    history,
-    params,
-    isPlottingLive,
-    isGifSaved,
-    isJsonSaved,
-    saveName,
+    sim: Simulation,
+    isPlottingLive: bool,
+    isGifSaved: bool,
+    saveName: str,
 ):
+    """Runs the simulation until the end of its duration, while plotting it, saving it as a gif
+    and saving its history, if asked to.
 
-    bu, end = bcolors.BU, bcolors.ENDC
-    sliders, conveyors, beams = defineObjects(params)
+    Args:
+        sim (Simulation): Simulation to run
+        isPlottingLive (bool): Whether the simulation is shown live
+        isGifSaved (bool): Whether the simulation is saved as a gif
+        saveName (str): Name under which to save the history
 
-    initRuckig(conveyors, sliders)
-    setExtraLookingRange(sliders[0][0], conveyors)
+    Returns:
+        The error met during the simulation, "interupt" if the user stopped it, None otherwise
+    """
+    bu, end = bcolors.BU, bcolors.ENDC
     plotEvery = 5
-    max_time = params["duration"]  # Time to render in [s]
-    frames = int(max_time / cfg.dt) // plotEvery
+    max_time = sim.params["duration"]  # Time to render in [s]
+    frames = int(max_time / sim.dt) // plotEvery
+    running = True
 
     def on_key_press(event):
-        global running
+        nonlocal running
         if event.key == "q":
             print(
                 f"{LINE_START}{bcolors.WARNING}Quit key pressed. Exiting...{bcolors.ENDC}"
@@ -157,10 +174,10 @@ def initCode(
     "Set up the plot"
     if isPlottingLive or isGifSaved:
         fig, ax, fig_dim, plot_elements = plotter.setupPlot(
-            conveyors,
-            sliders,
-            beams,
-            params,
+            sim.conveyors,
+            sim.sliders,
+            sim.beams,
+            sim.params,
             isGifSaved,
             on_key_press,
         )
@@ -170,18 +187,15 @@ def initCode(
         "Create the animation"
         ani = FuncAnimation(
             fig,
-            update,
-            fargs=(
-                sliders,
-                conveyors,
-                beams,
-                plot_elements,
-                ax,
-                fig_dim,
+            lambda frame: update(
+                sim,
                 plotEvery,
                 max_time,
+                isPlottingLive,
                 isGifSaved,
-                isJsonSaved,
+                plot_elements,
+                ax,
+                fig_dim,
             ),
             frames=frames,
             init_func=lambda: plot_elements["all_artists"],
@@ -191,7 +205,7 @@ def initCode(
         "Save the animation as a GIF"
         ani.save(
             "simulation_animation.gif",
-            writer=PillowWriter(fps=1 / (1 * cfg.dt * plotEvery)),
+            writer=PillowWriter(fps=1 / (1 * sim.dt * plotEvery)),
         )  # Adjust fps as needed
         c = bcolors.OKGREEN
         print(f"{c}Time to compute: {bu}" + f"{time() - time_start:.2f} seconds{end}")
@@ -199,40 +213,32 @@ def initCode(
         print(f"{c}GIF created successfully!{end}")
     else:
         try:
-            global running
-            while t * cfg.dt < max_time and running:
+            while sim.t * sim.dt < max_time and running:
                 if isPlottingLive:
                     update(
-                        sliders,
-                        conveyors,
-                        beams,
+                        sim,
                         plotEvery,
                         max_time,
+                        isPlottingLive,
                         isGifSaved,
-                        isJsonSaved,
                         plot_elements,
                         ax,
                         fig_dim,
                     )
 
                 else:
-                    update(
-                        sliders,
-                        conveyors,
-                        beams,
-                        plotEvery,
-                        max_time,
-                        isGifSaved,
-                        isJsonSaved,
-                    )
+                    update(sim, plotEvery, max_time, isPlottingLive, isGifSaved)
         except (KeyboardInterrupt, SystemExit):
             c = bcolors.WARNING
             print(f"{LINE_START}{c}Interrupted by user.{end}")
-
-            running = False
+            if sim.isJsonSaved:
+                "The time steps recorded until then are still worth looking at"
+                saveHistoryAfterStop(sim, saveName)
             return "interupt"
         except Exception as e:
             print(f"An error occurred: {e}")
+            if sim.isJsonSaved:
+                saveHistoryAfterStop(sim, saveName)
             return {e}
 
     c, b, bu, end = bcolors.OKGREEN, bcolors.BOLD, bcolors.BU, bcolors.ENDC
@@ -243,17 +249,15 @@ def initCode(
     )
     c = bcolors.OKCYAN
     c2 = bcolors.FAIL
-    if isJsonSaved:
-        saveHistory(
-            history, cfg.listStat, params, f"{saveName}_{i}" if nRuns > 1 else saveName
-        )
+    if sim.isJsonSaved:
+        saveHistory(sim.history, [sim.results()], sim.params, saveName)
     print(LINE_START)
-    mp = cfg.listStat[-1]["missedPicks"]
-    tp = cfg.listStat[-1]["totalPicks"]
-    md = cfg.listStat[-1]["missedDrops"]
-    td = cfg.listStat[-1]["totalDrops"]
-    up = cfg.listStat[-1]["unfilledPackages"]
-    tpk = cfg.listStat[-1]["totalPackages"]
+    mp = sim.stats["missedPicks"]
+    tp = sim.stats["totalPicks"]
+    md = sim.stats["missedDrops"]
+    td = sim.stats["totalDrops"]
+    up = sim.stats["unfilledPackages"]
+    tpk = sim.stats["totalPackages"]
     print(
         f"{LINE_START}{c}Total missed picks: {c2}{b}{mp} ({mp*100/tp:.4f}%){end}\n"
         + f"{LINE_START}{c}Total missed drops: {c2}{b}{md} ({md*100/td:.4f}%){end}\n"
@@ -273,11 +277,10 @@ if __name__ == "__main__":
         single_run,
         seed,
         saveName,
+        settings,
     ) = cfg.initParams(args)
     c, b, end = bcolors.HEADER, bcolors.BOLD, bcolors.ENDC
 
-    cfg.statTemplate["dt"] = cfg.dt
-
     if single_run:
         nRuns = 1
         nRunsPerParameter = 1
@@ -343,8 +346,61 @@ if __name__ == "__main__":
     convInitialSpeed = cfg.defineOutSpeed(convInputSpeed, params)
     params["conveyor"]["speed"] = list(convInitialSpeed)
     total_time = time()
-    global running
-    running = True
+
+    """A sweep is described by everything its runs depend on. The description is saved with its
+    log, and a resumed sweep must match it, so that the runs of two sweeps are never mixed"""
+    if isCVSSaved:
+        savedSweep = loadSweep(saveName) if args.resume is not None else None
+        if args.resume is not None and savedSweep is None:
+            print(f"{bcolors.FAIL}No sweep to resume under {saveName}. Exiting...{end}")
+            exit()
+        if args.resume is None and hasRunLog(saveName):
+            print(
+                f"{bcolors.FAIL}Runs are already logged under {saveName}."
+                + f" Resume them with -resume, or choose another -name. Exiting...{end}"
+            )
+            exit()
+
+        "The root seed of a sweep is drawn here, so that it can be resumed"
+        if seed is None and savedSweep is not None:
+            seed = savedSweep["seed"]
+        elif seed is None and not single_run:
+            seed = cfg.newSeed()
+        sweep = json.loads(
+            json.dumps(
+                {
+                    "params": params,
+                    "settings": settings,
+                    "paramName": paramName,
+                    "nRuns": nRuns,
+                    "nRunsPerParameter": nRunsPerParameter,
+                    "seed": seed,
+                    "pickStream": args.pick_stream,
+                },
+                default=lambda o: np.asarray(o).tolist(),
+            )
+        )
+        if savedSweep is None:
+            saveSweep(sweep, saveName)
+        elif sweep != savedSweep:
+            changed = [name for name in sweep if sweep[name] != savedSweep.get(name)]
+            print(
+                f"{bcolors.FAIL}The sweep {saveName} was started with other"
+                + f" {', '.join(changed)}. Exiting...{end}"
+            )
+            exit()
+
+    """Every run is described by a task, so that they can be sent to a pool of processes. Each run
+    gets its own seed, spawned from the given one, to keep the sweep reproducible"""
+    if single_run:
+        seeds = [seed]
+    elif args.pick_stream:
+        "Every parameter value sees the same products, for a given repetition"
+        seeds = cfg.spawnSeeds(seed, nRunsPerParameter) * nRuns
+    else:
+        seeds = cfg.spawnSeeds(seed, nRuns * nRunsPerParameter)
+    variedParam = None
+    tasks = []
     for i in range(nRuns):
 
         if not single_run:
@@ -363,53 +419,91 @@ if __name__ == "__main__":
                     convInitialSpeed = cfg.defineOutSpeed(convInputSpeed, params)
                     params["conveyor"]["speed"] = list(convInitialSpeed)
                 # variedParam = params["beam"]["scheduling"] = scheduling[i]
-                # variedParam = params["dt"] = cfg.dt = test_dt[i]
-
-        if isCVSSaved and not single_run:
-            cfg.statTemplate[paramName] = variedParam
+                # variedParam = params["timeStep"] = test_dt[i]
 
         ### Let the magic work
         ####################################################################################
 
         for j in range(nRunsPerParameter):
-            print(SEPARATOR)
-            print(SEPARATOR2)
-            cfg.newStatEntry(params)
-
-            err = 0
-            # Note : We could try to use multithreading here, when runnning multiple parameters, to make the process faster
-            while err is not None:
-                history = {}
-                t = 0
-                print(
-                    f"{LINE_START}{c}Starting run {i*nRunsPerParameter + j+1} / {nRuns*nRunsPerParameter}"
-                    +f" [{(i*nRunsPerParameter + j+1) / (nRuns*nRunsPerParameter)*100:.2f}%]{end}"
-                )
-                if not single_run:
-                    print(f"{LINE_START}{c}Using parameters {variedParam}{end}")
-
-                cfg.newSeed(seed)
+            tasks.append(
+                {
+                    "i": i,
+                    "j": j,
+                    "nRuns": nRuns,
+                    "runID": i * nRunsPerParameter + j + 1,
+                    "nTasks": nRuns * nRunsPerParameter,
+                    "params": copy.deepcopy(params),
+                    "paramName": paramName if isCVSSaved and not single_run else None,
+                    "variedParam": variedParam,
+                    "seed": seeds[i * nRunsPerParameter + j],
+                    "singleRun": single_run,
+                    "settings": settings,
+                    "pickStream": args.pick_stream,
+                    "isPlottingLive": isPlottingLive,
+                    "isGifSaved": isGifSaved,
+                    "isJsonSaved": isJsonSaved,
+                    "saveName": saveName,
+                }
+            )
 
-                err = initCode(
-                    history, params, isPlottingLive, isGifSaved, isJsonSaved, saveName
+    """Runs that are already in the log of a resumed sweep are not computed again. Each run is
+    logged as soon as it is done, so that an interrupted sweep can be resumed"""
+    doneRuns = {}
+    if args.resume is not None:
+        doneRuns = {(run["i"], run["j"]): run for run in loadRunLog(saveName)}
+        c2 = bcolors.OKCYAN
+        print(f"{LINE_START}{c2}Resuming {saveName}: {len(doneRuns)} runs already done{end}")
+    pendingTasks = [task for task in tasks if (task["i"], task["j"]) not in doneRuns]
+
+    if args.pick_stream:
+        "The streams are generated once, before being shared by the processes"
+        for task in pendingTasks:
+            getPickStream(task["params"], task["seed"])
+
+    if args.jobs > 1:
+        executor = ProcessPoolExecutor(max_workers=args.jobs)
+        futures = {executor.submit(runTask, task): task for task in pendingTasks}
+        results = ((futures[f], f.result()) for f in as_completed(futures))
+    else:
+        executor = None
+        results = ((task, runTask(task)) for task in pendingTasks)
+
+    listError = []
+    try:
+        for task, (stat, errors, isInterrupted) in results:
+            if isInterrupted:
+                raise KeyboardInterrupt
+            listError.extend(errors)
+            if stat is None:
+                continue
+
+            """The kinematics stay arrays, and are logged in a file of their own. Only its name is
+            kept, not to hold the kinematics of every run until the end of the sweep"""
+            kinematics = {name: stat.pop(name) for name in KINEMATICS_STATS}
+            "The stats go through json, so that logged and computed runs are saved the same way"
+            run = json.loads(
+                json.dumps(
+                    {"i": task["i"], "j": task["j"], "stat": stat},
+                    default=lambda o: np.asarray(o).tolist(),
                 )
-                if single_run:
-                    err = None
-                if err is None:
-                    cfg.listStat[-1]["totalTimeSteps"] = t
-
-                    print(SEPARATOR2)
-                elif err == "interupt":
-                    pass
-                else:
-                    cfg.newErrEntry(err, i, j, paramName, variedParam)
-
-                if not running:
-                    exit()
-            if not running:
-                break
-        if not running:
-            break
+            )
+            if isCVSSaved:
+                appendRunLog(run, kinematics, saveName)
+            doneRuns[(task["i"], task["j"])] = run
+    except KeyboardInterrupt:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        exit()
+    if executor is not None:
+        executor.shutdown()
+
+    "The stats are merged in the order of the tasks, whatever the order they finished in"
+    cfg.listStat[:] = [
+        doneRuns[(task["i"], task["j"])]["stat"]
+        for task in tasks
+        if (task["i"], task["j"]) in doneRuns
+    ]
+    cfg.listError[:] = listError
 
     if isCVSSaved:
         if nRuns == 1 and nRunsPerParameter == 1:
@@ -1,16 +1,23 @@
 from typing import List
-from ruckig import InputParameter, OutputParameter, Ruckig, Trajectory, ControlInterface
+from collections import OrderedDict
+from ruckig import (
+    InputParameter,
+    OutputParameter,
+    Ruckig,
+    Trajectory,
+    ControlInterface,
+    Result,
+)
 
 from description.objects import Object
 from description.constants import *
-import description.config as cfg
 
 
 def initRuckig(*args: Object):
     ## right now it cannot take a nested list, such as the sliders list. Fix this
     for obj in args:
-        obj.otg = Ruckig(obj.DoF, cfg.dt)
-        obj.dt = cfg.dt
+        obj.otg = Ruckig(obj.DoF, obj.sim.dt)
+        obj.dt = obj.sim.dt
 
         obj.inp = InputParameter(obj.DoF)
         obj.out = OutputParameter(obj.DoF)
@@ -42,41 +49,137 @@ def initRuckig(*args: Object):
             pass
 
         obj.trajectory = Trajectory(obj.DoF)
-
-
-def updateRuckig(obj: Object):
-    """Compute the trajectory of the objects in the simulation. Only for sliders"""
-    # print("Updating Ruckig")
-    #
-    obj.inp.current_position = [
-        round(num, ROUNDING_DECIMALS) for num in obj.inp.current_position
-    ]
-    obj.inp.current_velocity = [
-        round(num, ROUNDING_DECIMALS) for num in obj.inp.current_velocity
-    ]
-    obj.inp.current_acceleration = [
-        round(num, ROUNDING_DECIMALS) for num in obj.inp.current_acceleration
-    ]
-    obj.inp.target_position = [
-        round(num * MM_TO_M, ROUNDING_DECIMALS) for num in obj.targetPosition
-    ]
-
-    obj.moveStatus = obj.otg.update(obj.inp, obj.out)
-    obj.position = [num * M_TO_MM for num in obj.out.new_position]
-    obj.currentVelocity = [num * M_TO_MM for num in obj.out.new_velocity]
-    obj.currentAcceleration = [num * M_TO_MM for num in obj.out.new_acceleration]
-    obj.out.pass_to_input(obj.inp)
-
-
-def computeWholeTrajectory(obj: Object, targetPos: List[float]):
-
+        "Trajectory followed by the object, planned at the time step planStart"
+        obj.plannedTrajectory = None
+        obj.planStart = 0
+        obj.plannedTarget = None
+
+
+def updateRuckig(obj: Object, hasNewTarget: bool) -> tuple[list, list, list]:
+    """Moves the object by one time step along its trajectory. The trajectory is only planned
+    when the target position changed since the last plan. Otherwise, the planned one is replayed
+    by sampling it at the current time. Only for sliders
+
+    Args:
+        obj (Object): Object to move
+        hasNewTarget (bool): Whether the target position changed since the last plan
+
+    Returns:
+        tuple[list, list, list]: New position, velocity and acceleration of the object, in [m].
+        Converting them is left to the caller, to do it for every slider at once.
+    """
+    if hasNewTarget:
+        "findViableTarget usually computed this trajectory already, so it comes from the cache"
+        computeWholeTrajectory(obj, obj.targetPosition, isFollowed=True)
+        obj.plannedTrajectory = obj.trajectory
+        obj.planStart = obj.sim.t
+        obj.plannedTarget = list(obj.inp.target_position)
+
+    elapsed = (obj.sim.t - obj.planStart + 1) * obj.dt
+    position, velocity, acceleration = obj.plannedTrajectory.at_time(elapsed)[:3]
+    if elapsed < obj.plannedTrajectory.duration:
+        obj.moveStatus = Result.Working
+    else:
+        """Once the trajectory is over, the object stands still on its target. Sampling the end
+        of the trajectory leaves rounding errors on the position, on which Ruckig can fail to
+        compute the next trajectory"""
+        obj.moveStatus = Result.Finished
+        position = obj.plannedTarget
+        velocity = acceleration = [0.0] * obj.DoF
+
+    obj.inp.current_position = position
+    obj.inp.current_velocity = velocity
+    obj.inp.current_acceleration = acceleration
+    return position, velocity, acceleration
+
+
+class TrajectoryCache:
+    """Bounded LRU cache of the trajectories computed by Ruckig. The key is made of the
+    kinematic limits, the current state and the target of the object, quantized with the
+    tolerance. A tolerance of 0 only reuses trajectories computed from the exact same inputs.
+    Each entry keeps the exact inputs it was computed from, so that a lookup can also ask for
+    them. Each simulation has its own cache, which counts its hits and misses in the given stats.
+    """
+
+    def __init__(
+        self, stats: dict, maxSize: int = TRAJECTORY_CACHE_SIZE, tolerance: float = 0
+    ):
+        self.stats = stats
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        "Tolerance, in [mm], used to quantize the inputs"
+        self.step = tolerance * MM_TO_M
+
+    def inputs(self, inp: InputParameter) -> tuple:
+        return (
+            *inp.max_velocity,
+            *inp.max_acceleration,
+            *inp.max_jerk,
+            *inp.current_position,
+            *inp.current_velocity,
+            *inp.current_acceleration,
+            *inp.target_position,
+            *inp.target_velocity,
+            *inp.target_acceleration,
+        )
+
+    def key(self, inputs: tuple) -> tuple:
+        if self.step:
+            return tuple(round(num / self.step) for num in inputs)
+        return inputs
+
+    def get(self, key: tuple, inputs: tuple = None):
+        """Returns the entry of the key, or None if there is none. If inputs are given, an entry
+        computed from other inputs, within the tolerance, is not returned either"""
+        entry = self.entries.get(key)
+        if entry is None or (inputs is not None and entry[2] != inputs):
+            self.stats["trajectoryCacheMisses"] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.stats["trajectoryCacheHits"] += 1
+        return entry
+
+    def put(self, key: tuple, entry: tuple):
+        self.entries[key] = entry
+        if len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+            self.stats["trajectoryCacheEvictions"] += 1
+
+
+def computeWholeTrajectory(obj: Object, targetPos: List[float], isFollowed: bool = False):
+    """Compute the whole trajectory from the current state of the object to the target position,
+    and store it in obj.trajectory. Reuses a previously computed trajectory when the inputs are
+    the same, within the tolerance of the cache.
+
+    Args:
+        obj (Object): Object to move. Only for sliders
+        targetPos (List[float]): Position to reach, in [mm]. The missing coordinates are taken
+        from the target position of the object.
+        isFollowed (bool, optional): Whether the object will follow the trajectory. Such a
+        trajectory must start from the exact current state of the object, so the tolerance of the
+        cache doesn't apply. Defaults to False, for the trajectories only used to plan.
+
+    Returns:
+        float: Duration of the trajectory, in [s]
+    """
+    "Every coordinate is given, so that the same target always leads to the same cache key"
+    targetPos = [*targetPos, *obj.targetPosition[len(targetPos) :]]
     obj.inp.target_position = [
         round(num * MM_TO_M, ROUNDING_DECIMALS) for num in targetPos
     ]
     obj.inp.current_velocity = [
         round(num * MM_TO_M, ROUNDING_DECIMALS) for num in obj.currentVelocity
     ]
-    obj.moveStatus = obj.otg.calculate(obj.inp, obj.trajectory)
+    trajectoryCache = obj.sim.trajectoryCache
+    inputs = trajectoryCache.inputs(obj.inp)
+    key = trajectoryCache.key(inputs)
+    entry = trajectoryCache.get(key, inputs if isFollowed else None)
+    if entry is None:
+        "Cached trajectories are never modified, so a new one is needed for each calculation"
+        trajectory = Trajectory(obj.DoF)
+        entry = (trajectory, obj.otg.calculate(obj.inp, trajectory), inputs)
+        trajectoryCache.put(key, entry)
+    obj.trajectory, obj.moveStatus = entry[:2]
 
     travel_time = obj.trajectory.duration
     return travel_time
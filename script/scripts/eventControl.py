@@ -0,0 +1,189 @@
+from ruckig import Result
+
+from scripts.trajectoryControl import getLookingWindow
+
+from description.objects import *
+from description.constants import *
+
+
+def countQuietSteps(
+    sliders: list[list[Slider]], conveyors: Conveyor, beams: Beam
+) -> int:
+    """Counts the number of upcoming time steps during which nothing but the conveyors can move.
+    The next event is the earliest of: a slider that isn't at rest, a Z movement that ends, a
+    target that enters the looking window of an idle rail, a new row that spawns, or a rail that
+    bounces between states. Every count is taken one step short, so that rounding errors can
+    only bring the next event forward.
+
+    Args:
+        sliders (list[list[Slider]]): List of rails, which are list of sliders objects
+        conveyors (Conveyor): object of the class Conveyor, containing all of the informations
+                              regarding conveyors
+        beams (Beam): object of the class Beam, containing all of the informations
+                              regarding beams
+
+    Returns:
+        int: Number of time steps that can be skipped, 0 if the next one must be computed.
+    """
+    for railID, rail in enumerate(sliders):
+        if beams.bouncingInitState[railID]:
+            "Bouncing rails change state at every step"
+            return 0
+
+        for slider in rail:
+            if not isAtRest(slider, conveyors):
+                return 0
+
+    nSteps = min(
+        stepsToGeneration(conveyors, "in"), stepsToGeneration(conveyors, "out")
+    )
+    targetsPos = {}
+    for railID, rail in enumerate(sliders):
+        if nSteps <= 0:
+            break
+
+        if beams.railStatus[railID] in (CAN_PICK, CAN_PLACE):
+            inOrOut = "in" if beams.railStatus[railID] == CAN_PICK else "out"
+            if inOrOut not in targetsPos:
+                targetsPos[inOrOut] = getEligibleTargetsPos(conveyors, beams, inOrOut)
+            nSteps = min(
+                nSteps,
+                stepsToWindow(conveyors, beams, rail, inOrOut, targetsPos[inOrOut]),
+            )
+
+        else:
+            nSteps = min(nSteps, stepsToEndOfZMove(rail, beams.railStatus[railID]))
+
+    return max(int(nSteps), 0)
+
+
+def isAtRest(slider: Slider, conveyors: Conveyor) -> bool:
+    """Checks whether the slider has finished its trajectory and stands on its target position.
+    Updating such a slider leaves it, and its state, unchanged.
+
+    Args:
+        slider (Slider): Slider to check
+        conveyors (Conveyor): Conveyor object, for the error margin
+
+    Returns:
+        bool: True if the slider is at rest
+    """
+    if getattr(slider, "moveStatus", None) != Result.Finished:
+        return False
+    if any(slider.currentVelocity) or any(slider.currentAcceleration):
+        return False
+    return all(
+        abs(pos - targetPos) < conveyors.errorMargin
+        for pos, targetPos in zip(slider.position[:2], slider.targetPosition[:2])
+    )
+
+
+def stepsToEndOfZMove(rail: list[Slider], railStatus: int) -> float:
+    """Counts the steps before a picking or placing rail changes state, which only happens at the
+    end of the Z movement of one of its sliders.
+
+    Args:
+        rail (list[Slider]): List of sliders that are on the same rail.
+        railStatus (int): Current status of the rail, PICKING or PLACING
+
+    Returns:
+        float: Number of steps without any state change
+    """
+    "States that are left unchanged by nextSliderState"
+    steadyStates = (IDLE, SKIP_N_WAIT)
+    if railStatus == PICKING:
+        steadyStates += (SKIPPED,)
+    nSteps = np.inf
+    for slider in rail:
+        if slider.status == Z_MVMT:
+            elapsed = slider.sim.t - slider.start_z_move
+            nSteps = min(nSteps, np.floor(TIME_Z_MOVE / slider.sim.dt - elapsed) - 1)
+        elif slider.status not in steadyStates:
+            return 0
+
+    "Without any Z movement left, the rail is done and will change state"
+    return nSteps if nSteps != np.inf else 0
+
+
+def stepsToGeneration(conveyors: Conveyor, inOrOut: str) -> float:
+    """Counts the steps before a new row of picks or drops is generated.
+
+    Args:
+        conveyors (Conveyor): Conveyor object containing information about the conveyors.
+        inOrOut (str): "in" or "out" depending on the target type.
+
+    Returns:
+        float: Number of steps before the next generation
+    """
+    if inOrOut == "in":
+        IdConv = 0
+        spacing = conveyors.inRowSpacing
+        nGenerations = conveyors.nPickGenerations
+    else:
+        IdConv = 1
+        spacing = (
+            conveyors.packagesRowSpacing * conveyors.nPackagesRow
+            + conveyors.packagesExtraSpacing
+        )
+        nGenerations = conveyors.nDropGenerations
+
+    distance = spacing * nGenerations - conveyors.new_position[IdConv]
+    return np.floor(distance / conveyors.deltaMove[IdConv]) - 1
+
+
+def getEligibleTargetsPos(
+    conveyors: Conveyor, beams: Beam, inOrOut: str
+) -> np.ndarray:
+    """Positions, along the conveyor, of the targets that could still be assigned.
+
+    Args:
+        conveyors (Conveyor): Conveyor object containing information about the conveyors.
+        beams (Beam): Beam object containing beam information.
+        inOrOut (str): "in" or "out" depending on the target type.
+
+    Returns:
+        np.ndarray: Coordinates of the targets, along the conveyor.
+    """
+    listTargets = conveyors.picks if inOrOut == "in" else conveyors.drops
+    handles = listTargets.handles()
+    status = listTargets.status[handles]
+    if inOrOut == "in":
+        isEligible = (status == FREE) | (status == SKIPPED)
+    else:
+        isEligible = (status == NORMAL) | (status == SKIPPED)
+    return listTargets.positions(handles[isEligible])[:, beams.direction[ORTHOG_DIR]]
+
+
+def stepsToWindow(
+    conveyors: Conveyor,
+    beams: Beam,
+    rail: list[Slider],
+    inOrOut: str,
+    targetsPos: np.ndarray,
+) -> float:
+    """Counts the steps before one of the targets enters the looking window of the rail.
+
+    Args:
+        conveyors (Conveyor): Conveyor object containing information about the conveyors.
+        beams (Beam): Beam object containing beam information.
+        rail (list[Slider]): List of sliders that are on the same rail.
+        inOrOut (str): "in" or "out" depending on the target type.
+        targetsPos (np.ndarray): Coordinates of the eligible targets, along the conveyor.
+
+    Returns:
+        float: Number of steps before a target can be assigned to the rail
+    """
+    DoIC = getattr(conveyors, f"{inOrOut}Direction")
+    signDoIC = DoIC[DoIC[SAME_DIR]]
+    minPos, maxPos = getLookingWindow(conveyors, beams, rail, inOrOut)
+
+    "Targets that already went past the window will never enter it"
+    if signDoIC == 1:
+        distance = minPos - targetsPos[targetsPos < maxPos]
+    else:
+        distance = targetsPos[targetsPos > minPos] - maxPos
+
+    if distance.size == 0:
+        return np.inf
+    IdConv = 0 if inOrOut == "in" else 1
+    return np.floor(distance.min() / conveyors.deltaMove[IdConv]) - 1
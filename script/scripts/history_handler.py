@@ -0,0 +1,709 @@
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import deque
+from itertools import chain
+import numpy as np
+
+from description.constants import *
+
+"""Chunked binary history. The history of a simulation is a folder holding an index.json and
+the chunks of HISTORY_CHUNK_SIZE frames, as binary files. The frame i of the history is the
+row i % chunkSize of the chunk i // chunkSize. A frame is recorded every few time steps, and
+at every time step around the events, so the time step of each frame is given by the steps
+column. The index gives the number of frames and of time steps, the duration of a time step,
+the size of the chunks, the ID and number of the entities, and the first frame, first time
+step and size of every chunk.
+
+A chunk file starts with the length of a JSON header, as a little-endian uint32, then the
+header itself, padded with spaces to a multiple of 8 bytes. The header gives the direction of
+the belts and, for every column, its dtype, its shape and the offset of its data, from the end
+of the header. Each column is a contiguous little-endian array, aligned on 8 bytes, so that it
+can be mapped directly into a typed array. The size of a chunk is thus a multiple of 8 as well.
+
+Every chunk can be decoded on its own. Its first frame is a keyframe, and the following ones
+only hold what changed:
+- the positions and status of the sliders, and the status of the beams, are the values of the
+first frame (.key), then for each following frame a bitmask of the values that changed
+(.changed, as packed by np.packbits), and the new values, in the order of the bitmask (.value);
+- the items of the first frame, and the ones that appear later, are given once with their
+handle, their position in the frame of their belt and their status (.birth). Then come the
+handles of the items that disappear (.death), and the status that change (.status);
+- the distance travelled by each belt is given when it doesn't move by the same distance as
+in the previous time step (.belt), and always on the first frame."""
+HISTORY_VERSION = 4
+HISTORY_ALIGNMENT = 8
+HISTORY_DTYPES = {
+    "float64": "<f8",
+    "float32": "<f4",
+    "int32": "<i4",
+    "int16": "<i2",
+    "int8": "i1",
+    "uint8": "u1",
+}
+
+
+"Number of time steps in a chunk of the history"
+HISTORY_CHUNK_SIZE = 256
+"Number of chunks that can wait for the writer thread before the simulation is held back"
+HISTORY_QUEUE_SIZE = 4
+"Stats counting the events around which the history is recorded at every time step"
+HISTORY_EVENTS = ("totalPicks", "totalDrops", "missedPicks", "missedDrops", "unfilledPackages")
+
+
+class HistoryRecorder:
+    def __init__(
+        self,
+        chunkSize=HISTORY_CHUNK_SIZE,
+        queueSize=HISTORY_QUEUE_SIZE,
+        every=1,
+        aroundEvents=0,
+    ):
+        """Records a snapshot of the position and status of every object, every few time
+        steps. The simulation only copies the arrays of each snapshot. Every chunkSize
+        snapshots, they are handed through a bounded queue to a thread, which writes them as a
+        chunk of the history in a temporary folder. The memory used is thus the same
+        whatever the duration of the run, and saving the history only moves the chunks and
+        writes the index.
+
+        Args:
+            chunkSize (int, optional): Number of snapshots in a chunk. Defaults to
+            HISTORY_CHUNK_SIZE.
+            queueSize (int, optional): Number of chunks waiting for the thread before the
+            simulation waits for it. Defaults to HISTORY_QUEUE_SIZE.
+            every (int, optional): Number of time steps between two snapshots. Defaults to 1.
+            aroundEvents (int, optional): Number of time steps recorded at every step before
+            and after each event, when every is above 1. Defaults to 0.
+        """
+        self.chunkSize = chunkSize
+        self.every = every
+        self.aroundEvents = aroundEvents
+        self.frames = []
+        self.nSteps = 0
+        self.sliderOrder = None
+        """Last copy of the items of each belt, with the version of the store it was made at.
+        The snapshots share it until the items change"""
+        self.items = [(None, None), (None, None)]
+
+        "Snapshots of the last time steps skipped, kept in case an event follows them"
+        self.skipped = deque(maxlen=aroundEvents)
+        self.nEvents = 0
+        "Last time step recorded at full rate after an event"
+        self.fullRateUntil = -1
+
+        self.spool = HistorySpool()
+        self.queue = queue.Queue(maxsize=queueSize)
+        self.writer = threading.Thread(
+            target=self.spool.writeChunks, args=(self.queue,), daemon=True
+        )
+        self.writer.start()
+        "The thread and the chunks are dropped with the recorder if it is never saved"
+        self.finalizer = weakref.finalize(
+            self, self.spool.close, self.queue, self.writer
+        )
+
+    def __len__(self):
+        return self.nSteps
+
+    def record(self, t, sliders, conveyors, beams, nEvents=0, isLast=False):
+        """Makes a snapshot of the current state of the system, if the time step is recorded.
+
+        Args:
+            t (int): current timeStep
+            sliders (list[list[Slider]]): List of a list of sliders. The first dimension is the
+            list of rails, and the second is the list of sliders on said rail
+            conveyors (Conveyor): Description of the conveyors
+            beams (Beam): Description of the beams
+            nEvents (int, optional): Number of events since the start of the run. The time
+            steps around a change of this number are all recorded. Defaults to 0.
+            isLast (bool, optional): Whether this is the last time step of the run. It is always
+            recorded, so that the history ends on the final state. Defaults to False.
+        """
+        isEvent = self.aroundEvents > 0 and nEvents != self.nEvents
+        self.nEvents = nEvents
+        if isEvent:
+            self.fullRateUntil = t + self.aroundEvents
+        isRecorded = t % self.every == 0 or t <= self.fullRateUntil or isLast
+        if not isRecorded and self.aroundEvents == 0:
+            return
+
+        snapshot = self.snapshot(t, sliders, conveyors, beams)
+        if not isRecorded:
+            self.skipped.append(snapshot)
+            return
+        if isEvent:
+            for frame in self.skipped:
+                self.append(frame)
+        "The snapshots skipped before this one can't be recorded anymore"
+        self.skipped.clear()
+        self.append(snapshot)
+
+    def snapshot(self, t, sliders, conveyors, beams):
+        """Copies the current state of the system.
+
+        Args:
+            t (int): current timeStep
+            sliders (list[list[Slider]]): List of a list of sliders
+            conveyors (Conveyor): Description of the conveyors
+            beams (Beam): Description of the beams
+
+        Returns:
+            tuple: Time step, slider positions and status, beam status, and the items of each
+            belt
+        """
+        if self.sliderOrder is None:
+            self.sliderOrder = [slider.ID for slider in chain.from_iterable(sliders)]
+            self.sliderStates = sliders[0][0].states
+
+            self.spool.directions = {
+                "targets": conveyors.picks.direction.tolist(),
+                "drops": conveyors.drops.direction.tolist(),
+            }
+
+        """The items are kept in the frame of their belt, in which they don't move. They are only
+        copied when they changed since the last snapshot, which most time steps don't"""
+        items = []
+        for idx, listItems in enumerate((conveyors.picks, conveyors.drops)):
+            version, columns = self.items[idx]
+            if version != listItems.version:
+                handles = listItems.handles()
+                columns = (handles, listItems.beltPos[handles], listItems.status[handles])
+                self.items[idx] = (listItems.version, columns)
+            items.append((*columns, listItems.beltOffset))
+        return (
+            t,
+            self.sliderStates.position[self.sliderOrder],
+            [slider.status for rail in sliders for slider in rail],
+            beams.railStatus.copy(),
+            *items,
+        )
+
+    def append(self, frame):
+        """Adds a snapshot to the history, and hands the chunk to the writer thread once full.
+
+        Args:
+            frame (tuple): Snapshot made by snapshot
+        """
+        "The history ends with its last snapshot"
+        self.nSteps = frame[0] + 1
+        self.frames.append(frame)
+        if len(self.frames) == self.chunkSize:
+            self.flush()
+
+    def flush(self):
+        """Hands the time steps recorded since the last chunk to the writer thread. Waits if
+        the queue is full."""
+        self.spool.raiseError()
+        if self.frames:
+            self.queue.put(self.frames)
+            self.frames = []
+
+    def save(self, folder, timeStep):
+        """Writes the history in the given folder, once the writer thread is done.
+
+        Args:
+            folder (str): Folder of the history
+            timeStep (float): Duration of a time step, in [s]
+        """
+        self.flush()
+        self.spool.stop(self.queue, self.writer)
+        self.spool.raiseError()
+        self.spool.moveTo(
+            folder, timeStep, self.chunkSize, self.sliderOrder, self.nSteps
+        )
+        self.finalizer()
+
+
+class HistorySpool:
+    def __init__(self):
+        """Chunks of the history, in a temporary folder until the history is saved. They are
+        only written by the writer thread of a HistoryRecorder."""
+        self.directory = tempfile.mkdtemp(prefix="history_")
+        "First frame, first time step and size in bytes of every chunk"
+        self.chunks = []
+        self.nFrames = 0
+        self.nBeams = None
+        "Direction of each belt, and the distance it last moved in a time step"
+        self.directions = None
+        self.distances = {"targets": 0.0, "drops": 0.0}
+        self.error = None
+
+    def writeChunks(self, chunks):
+        """Body of the writer thread. Writes the chunks of the queue until it gets None.
+
+        Args:
+            chunks (queue.Queue): Queue of the chunks, as lists of snapshots
+        """
+        while (frames := chunks.get()) is not None:
+            "After an error, the chunks are still taken so that the simulation is not blocked"
+            if self.error is None:
+                try:
+                    self.writeFrames(frames)
+                except Exception as e:
+                    self.error = e
+
+    def writeFrames(self, frames):
+        """Encodes a chunk of snapshots and writes it as the next chunk file.
+
+        Args:
+            frames (list[tuple]): Snapshots made by HistoryRecorder.record
+        """
+        steps, sliderPos, sliderStatus, beamStatus, targets, drops = zip(*frames)
+        columns = {"steps": np.array(steps, dtype=np.int32)}
+        for name, values, dtype in (
+            ("sliders.position", sliderPos, np.float32),
+            ("sliders.status", sliderStatus, np.int8),
+            ("beams.status", beamStatus, np.int8),
+        ):
+            columns.update(encodeChanges(name, np.array(values, dtype=dtype)))
+        for name, snapshots in (("targets", targets), ("drops", drops)):
+            columns.update(encodeItems(name, snapshots))
+            offsets = [offset for _, _, _, offset in snapshots]
+            beltColumns, self.distances[name] = encodeBelt(
+                name, offsets, self.distances[name]
+            )
+            columns.update(beltColumns)
+
+        path = os.path.join(self.directory, chunkName(len(self.chunks)))
+        nBytes = writeChunk(path, columns, {"directions": self.directions})
+        self.chunks.append(
+            {"firstFrame": self.nFrames, "firstStep": int(steps[0]), "bytes": nBytes}
+        )
+        self.nFrames += len(frames)
+        self.nBeams = len(beamStatus[0])
+
+    def raiseError(self):
+        if self.error is not None:
+            raise self.error
+
+    def stop(self, chunks, writer):
+        """Waits for the writer thread to write the chunks left in the queue.
+
+        Args:
+            chunks (queue.Queue): Queue of the chunks
+            writer (threading.Thread): Writer thread
+        """
+        if writer.is_alive():
+            chunks.put(None)
+            writer.join()
+
+    def close(self, chunks, writer):
+        """Stops the writer thread and deletes the chunks that were not saved.
+
+        Args:
+            chunks (queue.Queue): Queue of the chunks
+            writer (threading.Thread): Writer thread
+        """
+        self.stop(chunks, writer)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def moveTo(self, folder, timeStep, chunkSize, sliderIDs, nSteps):
+        """Moves the chunks in the folder of the history, and writes its index.
+
+        Args:
+            folder (str): Folder of the history
+            timeStep (float): Duration of a time step, in [s]
+            chunkSize (int): Number of frames in a chunk
+            sliderIDs (list[int]): ID of the slider of each column of the slider arrays
+            nSteps (int): Number of time steps until the last frame included
+        """
+        chunkFolder = os.path.join(folder, "chunks")
+        shutil.rmtree(chunkFolder, ignore_errors=True)
+        os.makedirs(chunkFolder)
+        for k in range(len(self.chunks)):
+            shutil.move(
+                os.path.join(self.directory, chunkName(k)),
+                os.path.join(chunkFolder, chunkName(k)),
+            )
+
+        index = {
+            "version": HISTORY_VERSION,
+            "nFrames": self.nFrames,
+            "nSteps": nSteps,
+            "timeStep": timeStep,
+            "chunkSize": chunkSize,
+            "entities": {
+                "sliders": sliderIDs or [],
+                "beams": list(range(self.nBeams or 0)),
+            },
+            "counts": {"sliders": len(sliderIDs or []), "beams": self.nBeams or 0},
+            "chunks": [
+                {"file": f"chunks/{chunkName(k)}", **chunk}
+                for k, chunk in enumerate(self.chunks)
+            ],
+        }
+        with open(os.path.join(folder, "index.json"), "w") as f:
+            json.dump(index, f, separators=(",", ":"))
+
+
+def chunkName(k):
+    return f"{k:05d}.bin"
+
+
+def writeChunk(path, columns, extraHeader=None):
+    """Writes columns in the binary format of a chunk.
+
+    Args:
+        path (str): Path of the file
+        columns (dict[str, np.ndarray]): Columns of the chunk, by name
+        extraHeader (dict, optional): Other entries of the header. Defaults to None.
+
+    Returns:
+        int: Size of the file, in bytes
+    """
+    header = {"nFrames": len(columns["steps"]), **(extraHeader or {}), "columns": {}}
+    offset = 0
+    for name, column in columns.items():
+        header["columns"][name] = {
+            "dtype": str(column.dtype),
+            "shape": list(column.shape),
+            "offset": offset,
+        }
+        offset += -(-column.nbytes // HISTORY_ALIGNMENT) * HISTORY_ALIGNMENT
+
+    headerBytes = json.dumps(header, separators=(",", ":")).encode()
+    "The header ends at a multiple of the alignment, counting its length"
+    headerBytes += b" " * (-(len(headerBytes) + 4) % HISTORY_ALIGNMENT)
+    with open(path, "wb") as f:
+        f.write(np.uint32(len(headerBytes)).astype("<u4").tobytes())
+        f.write(headerBytes)
+        for column in columns.values():
+            data = column.astype(HISTORY_DTYPES[str(column.dtype)]).tobytes()
+            f.write(data + b"\0" * (-len(data) % HISTORY_ALIGNMENT))
+        return f.tell()
+
+
+def readChunk(path):
+    """Reads a chunk of the history. The columns are views on the file's content.
+
+    Args:
+        path (str): Path of the file
+
+    Returns:
+        tuple[dict, dict[str, np.ndarray]]: Header of the chunk, and its encoded columns by name
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    headerLength = int(np.frombuffer(data, dtype="<u4", count=1)[0])
+    header = json.loads(data[4 : 4 + headerLength])
+    start = 4 + headerLength
+
+    columns = {}
+    for name, column in header["columns"].items():
+        dtype = np.dtype(HISTORY_DTYPES[column["dtype"]])
+        count = int(np.prod(column["shape"]))
+        columns[name] = np.frombuffer(
+            data, dtype=dtype, count=count, offset=start + column["offset"]
+        ).reshape(column["shape"])
+    return header, columns
+
+
+def encodeChanges(name, values):
+    """Encodes the values of every frame as the ones of the first frame, followed by a bitmask
+    of the values that changed in each frame, and their new values.
+
+    Args:
+        name (str): Name of the values
+        values (np.ndarray): (nFrames, ...) values of every frame
+
+    Returns:
+        dict[str, np.ndarray]: Encoded columns
+    """
+    flat = values.reshape(len(values), -1)
+    isChanged = flat[1:] != flat[:-1]
+    return {
+        f"{name}.key": values[0],
+        f"{name}.changed": np.packbits(isChanged, axis=1),
+        f"{name}.value": flat[1:][isChanged],
+    }
+
+
+def decodeChanges(columns, name):
+    """Rebuilds the values of every frame encoded by encodeChanges.
+
+    Args:
+        columns (dict[str, np.ndarray]): Encoded columns of the chunk
+        name (str): Name of the values
+
+    Returns:
+        np.ndarray: (nFrames, ...) values of every frame
+    """
+    key = columns[f"{name}.key"]
+    nFrames = len(columns["steps"])
+    isChanged = np.ones((nFrames, key.size), dtype=bool)
+    isChanged[1:] = np.unpackbits(columns[f"{name}.changed"], axis=1, count=key.size)
+    values = np.empty((nFrames, key.size), dtype=key.dtype)
+    values[0] = key.ravel()
+    values[1:][isChanged[1:]] = columns[f"{name}.value"]
+    "Each value is the one of the last frame where it changed"
+    lastChange = np.where(isChanged, np.arange(nFrames)[:, None], 0)
+    np.maximum.accumulate(lastChange, axis=0, out=lastChange)
+    values = np.take_along_axis(values, lastChange, axis=0)
+    return values.reshape(nFrames, *key.shape)
+
+
+def encodeItems(name, snapshots):
+    """Encodes the items of a belt. The first frame holds every item, with its handle, its
+    position in the frame of the belt, which never changes, and its status. The following
+    frames only hold the items that appeared, the handles of the items that disappeared, and
+    the status that changed. The items keep their order from one frame to the next, and the
+    new ones come last, as given by ItemStore.handles.
+
+    Args:
+        name (str): Name of the items
+        snapshots (list[tuple]): Handles, positions in the belt frame and status of the items
+        of every frame
+
+    Returns:
+        dict[str, np.ndarray]: Encoded columns
+    """
+    handles, beltPos, status, _ = snapshots[0]
+    births = [[handles], [beltPos], [status], [np.zeros(len(handles), dtype=int)]]
+    deaths = [[np.empty(0, dtype=int)] for _ in range(2)]
+    changes = [[np.empty(0, dtype=int)] for _ in range(3)]
+    for f, (newHandles, newBeltPos, newStatus, _) in enumerate(snapshots[1:], start=1):
+        if np.array_equal(newHandles, handles) and np.array_equal(newBeltPos, beltPos):
+            "Most frames have the same items as the previous one, only their status can change"
+            isChanged = newStatus != status
+            if isChanged.any():
+                changes[0].append(np.full(np.count_nonzero(isChanged), f))
+                changes[1].append(newHandles[isChanged])
+                changes[2].append(newStatus[isChanged])
+            status = newStatus
+            continue
+
+        "An item is the same as in the previous frame if it has the same slot and position"
+        slotIndex = np.full(max(handles.max(initial=0), newHandles.max(initial=0)) + 1, -1)
+        slotIndex[handles] = np.arange(len(handles))
+        index = slotIndex[newHandles]
+        isKept = index >= 0
+        isKept[isKept] = np.all(beltPos[index[isKept]] == newBeltPos[isKept], axis=1)
+        nKept = int(np.count_nonzero(isKept))
+        if not isKept[:nKept].all() or np.any(np.diff(index[:nKept]) <= 0):
+            raise ValueError(f"The {name} changed order at the frame {f} of the chunk")
+
+        isDead = np.ones(len(handles), dtype=bool)
+        isDead[index[:nKept]] = False
+        deaths[0].append(np.full(np.count_nonzero(isDead), f))
+        deaths[1].append(handles[isDead])
+        isChanged = newStatus[:nKept] != status[index[:nKept]]
+        changes[0].append(np.full(np.count_nonzero(isChanged), f))
+        changes[1].append(newHandles[:nKept][isChanged])
+        changes[2].append(newStatus[:nKept][isChanged])
+        births[0].append(newHandles[nKept:])
+        births[1].append(newBeltPos[nKept:])
+        births[2].append(newStatus[nKept:])
+        births[3].append(np.full(len(newHandles) - nKept, f))
+        handles, beltPos, status = newHandles, newBeltPos, newStatus
+
+    return {
+        f"{name}.birth.frame": np.concatenate(births[3]).astype(np.int16),
+        f"{name}.birth.id": np.concatenate(births[0]).astype(np.int32),
+        f"{name}.birth.beltPos": np.concatenate(births[1]).astype(np.float64),
+        f"{name}.birth.status": np.concatenate(births[2]).astype(np.int8),
+        f"{name}.death.frame": np.concatenate(deaths[0]).astype(np.int16),
+        f"{name}.death.id": np.concatenate(deaths[1]).astype(np.int32),
+        f"{name}.status.frame": np.concatenate(changes[0]).astype(np.int16),
+        f"{name}.status.id": np.concatenate(changes[1]).astype(np.int32),
+        f"{name}.status.value": np.concatenate(changes[2]).astype(np.int8),
+    }
+
+
+def encodeBelt(name, offsets, distance):
+    """Encodes the distance travelled by a belt. Each frame moves it by the same distance as
+    the previous one, unless a new offset and distance are given for that frame. The first
+    frame always has them.
+
+    Args:
+        name (str): Name of the items on the belt
+        offsets (list[float]): Distance travelled by the belt at every frame
+        distance (float): Distance travelled in the time step before the chunk
+
+    Returns:
+        tuple[dict[str, np.ndarray], float]: Encoded columns, and the distance travelled in
+        the last time step
+    """
+    events = [(0, offsets[0], distance)]
+    for f in range(1, len(offsets)):
+        if offsets[f - 1] + distance != offsets[f]:
+            distance = offsets[f] - offsets[f - 1]
+            events.append((f, offsets[f], distance))
+    frames, eventOffsets, distances = zip(*events)
+    columns = {
+        f"{name}.belt.frame": np.array(frames, dtype=np.int16),
+        f"{name}.belt.offset": np.array(eventOffsets, dtype=np.float64),
+        f"{name}.belt.distance": np.array(distances, dtype=np.float64),
+    }
+    return columns, distance
+
+
+def decodeChunk(header, columns):
+    """Rebuilds the state of every frame of a chunk.
+
+    Args:
+        header (dict): Header of the chunk
+        columns (dict[str, np.ndarray]): Encoded columns of the chunk
+
+    Returns:
+        dict[str, np.ndarray]: Columns of the frames, by name. Sliders and beams have one row
+        per frame, the items of the frame i are the rows offset[i] to offset[i + 1] of theirs.
+    """
+    nFrames = len(columns["steps"])
+    frames = {"steps": columns["steps"]}
+    for name in ("sliders.position", "sliders.status", "beams.status"):
+        frames[name] = decodeChanges(columns, name)
+
+    for name, direction in header["directions"].items():
+        "The offset of the belt is accumulated as the simulation did, to get the same values"
+        beltOffsets = np.empty(nFrames)
+        event = dict(
+            zip(
+                columns[f"{name}.belt.frame"].tolist(),
+                zip(
+                    columns[f"{name}.belt.offset"].tolist(),
+                    columns[f"{name}.belt.distance"].tolist(),
+                ),
+            )
+        )
+        for f in range(nFrames):
+            if f in event:
+                offset, distance = event[f]
+            else:
+                offset += distance
+            beltOffsets[f] = offset
+
+        bounds = {
+            field: np.searchsorted(
+                columns[f"{name}.{field}.frame"], np.arange(nFrames + 1)
+            )
+            for field in ("birth", "death", "status")
+        }
+        handles = np.empty(0, dtype=np.int32)
+        beltPos = np.empty((0, 2))
+        status = np.empty(0, dtype=np.int8)
+        itemsHandles, itemsPos, itemsStatus = [], [], []
+        for f in range(nFrames):
+            dead = columns[f"{name}.death.id"][bounds["death"][f] : bounds["death"][f + 1]]
+            isAlive = ~np.isin(handles, dead)
+            handles, beltPos, status = handles[isAlive], beltPos[isAlive], status[isAlive]
+
+            changes = slice(bounds["status"][f], bounds["status"][f + 1])
+            slotIndex = np.full(handles.max(initial=0) + 1, -1)
+            slotIndex[handles] = np.arange(len(handles))
+            status = status.copy()
+            status[slotIndex[columns[f"{name}.status.id"][changes]]] = columns[
+                f"{name}.status.value"
+            ][changes]
+
+            births = slice(bounds["birth"][f], bounds["birth"][f + 1])
+            handles = np.concatenate((handles, columns[f"{name}.birth.id"][births]))
+            beltPos = np.concatenate((beltPos, columns[f"{name}.birth.beltPos"][births]))
+            status = np.concatenate((status, columns[f"{name}.birth.status"][births]))
+
+            itemsHandles.append(handles)
+            itemsPos.append(beltPos + beltOffsets[f] * np.array(direction))
+            itemsStatus.append(status)
+
+        frames[f"{name}.offset"] = np.cumsum(
+            [0, *(len(h) for h in itemsHandles)], dtype=np.int32
+        )
+        frames[f"{name}.id"] = np.concatenate(itemsHandles)
+        frames[f"{name}.position"] = np.concatenate(itemsPos)
+        frames[f"{name}.status"] = np.concatenate(itemsStatus)
+    return frames
+
+
+def loadHistory(folder, start=0, end=None):
+    """Reads the frames start to end of a history. Only the chunks holding them are read.
+
+    Args:
+        folder (str): Folder of the history
+        start (int, optional): First frame. Defaults to 0.
+        end (int, optional): Frame after the last one. Defaults to None, for the last frame.
+
+    Returns:
+        tuple[dict, dict[str, np.ndarray]]: The index of the history, and the columns of the
+        frames by name. The offsets of the items start at 0 on the first frame.
+    """
+    with open(os.path.join(folder, "index.json")) as f:
+        index = json.load(f)
+    chunkSize = index["chunkSize"]
+    end = index["nFrames"] if end is None else min(end, index["nFrames"])
+    if end <= start:
+        raise ValueError(f"No frame between {start} and {end}")
+
+    parts = []
+    for k in range(start // chunkSize, (end - 1) // chunkSize + 1):
+        chunk = decodeChunk(*readChunk(os.path.join(folder, index["chunks"][k]["file"])))
+        first = index["chunks"][k]["firstFrame"]
+        parts.append(
+            sliceFrames(chunk, max(start - first, 0), min(end - first, chunkSize))
+        )
+
+    columns = {}
+    for name in parts[0]:
+        if name.endswith(".offset"):
+            "Each part starts its offsets at 0, they continue from the previous part"
+            shift = np.cumsum([0] + [part[name][-1] for part in parts[:-1]])
+            columns[name] = np.concatenate(
+                [parts[0][name][:1]]
+                + [part[name][1:] + s for part, s in zip(parts, shift)]
+            )
+        else:
+            columns[name] = np.concatenate([part[name] for part in parts])
+    return index, columns
+
+
+def sliceFrames(columns, start, end):
+    """Keeps the frames start to end of columns.
+
+    Args:
+        columns (dict[str, np.ndarray]): Columns of the history, by name
+        start (int): First frame
+        end (int): Frame after the last one
+
+    Returns:
+        dict[str, np.ndarray]: Columns of the frames, by name, with offsets starting at 0
+    """
+    sliced = {}
+    for name in ("steps", "sliders.position", "sliders.status", "beams.status"):
+        sliced[name] = columns[name][start:end]
+    for name in ("targets", "drops"):
+        offsets = columns[f"{name}.offset"][start : end + 1]
+        sliced[f"{name}.offset"] = offsets - offsets[0]
+        for field in ("id", "position", "status"):
+            sliced[f"{name}.{field}"] = columns[f"{name}.{field}"][offsets[0] : offsets[-1]]
+    return sliced
+
+
+def historyStep(columns, i):
+    """Rebuilds the snapshot of the i-th recorded time step, with the same layout as the former
+    json history.
+
+    Args:
+        columns (dict[str, np.ndarray]): Columns of the history, by name
+        i (int): Index of the time step in the history
+
+    Returns:
+        dict: Position and status of every object at that time step
+    """
+    def rounded(positions):
+        return np.round(positions.astype(float), decimals=ROUNDING_JSON).tolist()
+
+    snapshot = {}
+    for name in ("targets", "drops"):
+        start, end = columns[f"{name}.offset"][i : i + 2]
+        snapshot[name] = {
+            "position": rounded(columns[f"{name}.position"][start:end]),
+            "status": columns[f"{name}.status"][start:end].tolist(),
+        }
+    snapshot["sliders"] = {
+        "position": rounded(columns["sliders.position"][i]),
+        "status": columns["sliders.status"][i].tolist(),
+    }
+    snapshot["beams"] = {"status": columns["beams.status"][i].tolist()}
+    return snapshot
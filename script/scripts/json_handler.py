@@ -1,6 +1,7 @@
+import ast
 import json
+import hashlib
 from time import time
-from itertools import chain
 import numpy as np
 import os
 import pandas as pd
@@ -158,56 +159,13 @@ def loadJson(resetParams=False):
     return params
 
 
-def writeHistory(history, s, c, b, t):
-    """Makes a snapshot of the current state of the system and saves it in the history dictionary.
-
-    Args:
-        history (dict): description of the position and status of every object at every timeSteps
-        s (List[List[Slider]]): List of a list of sliders. The first dimension is the list of rails, and the second is the list of sliders on said rail
-        c (Conveyors): Description of the conveyors
-        b (Beams): Description of the beams
-        t (float): current timeStep
-    """
-
-    # changer les arrondis pour mettre 2 décimals
-    history[t] = {
-        "targets": {
-            "position": np.round(
-                [pick["pos"] for pick in c.listPicks.values()],
-                decimals=ROUNDING_JSON,
-            ).tolist(),
-            "status": [pick["status"] for pick in c.listPicks.values()],
-        },
-        "drops": {
-            "position": np.round(
-                [drop["pos"].tolist() for drop in c.listDrops.values()],
-                decimals=ROUNDING_JSON,
-            ).tolist(),
-            "status": [drop["status"] for drop in c.listDrops.values()],
-        },
-        "sliders": {
-            "position": np.round(
-                [
-                    [coord for coord in slider.position]
-                    for slider in chain.from_iterable(s)
-                ],
-                decimals=ROUNDING_JSON,
-            ).tolist(),
-            "status": [slider.status for rail in s for slider in rail],
-        },
-        "beams": {
-            "status": [b.railStatus[railID] for railID in range(len(b.railStatus))],
-        },
-    }
-    return history
-
-
 def saveHistory(history, stat, params, saveName):
     """Saves the history and the parameters used for the running simulation inside a folder
     bearing the name of the current date, or the desired name if indicated.
 
     Args:
-        history (dict): description of the position and status of every object at every timeSteps
+        history (HistoryRecorder): position and status of every object at every timeSteps
+        stat (list[dict]): stats of the simulation
         params (dict): description of the parameters used for the simulation
         saveName (str): Name under which to save the simulation
     """
@@ -217,8 +175,7 @@ def saveHistory(history, stat, params, saveName):
 
     time_start = time()
     os.makedirs(f"pages/api/history/{saveName}", exist_ok=True)
-    with open(f"pages/api/history/{saveName}/history.json", "w") as f:
-        json.dump(history, f, separators=(",", ":"))
+    history.save(f"pages/api/history/{saveName}", params["timeStep"])
 
     saveStat(stat, params, saveName, folderName="history")
 
@@ -231,7 +188,11 @@ def saveHistory(history, stat, params, saveName):
 
 def saveStat(stat, params, saveName, folderName="stats"):
     """Saves the stats and the parameters used for the running simulation inside a folder
-    bearing the name of the current date, or the desired name if indicated.
+    bearing the name of the current date, or the desired name if indicated. The stats are
+    split by shape, so that none of them has to be parsed back from text (see splitStats):
+    stat.csv holds the scalar ones, one row per run, and stats.npz the arrays of the others.
+    The kinematics are too large to be copied there. They stay in a file per run, whose name is
+    in stat.csv, and the runs that don't have one yet are given one.
 
     Args:
         stat (dict): List of all the data collected during the simulation
@@ -248,8 +209,19 @@ def saveStat(stat, params, saveName, folderName="stats"):
     with open(f"pages/api/{folderName}/{saveName}/params.json", "w") as f:
         json.dump(params, f, separators=(",", ":"))
 
-    df = pd.DataFrame(stat)
-    pd.DataFrame.to_csv(df, f"pages/api/{folderName}/{saveName}/stat.csv", index=False)
+    stat = list(stat)
+    for run, runStat in enumerate(stat):
+        if all(name in runStat for name in KINEMATICS_STATS):
+            fileName = f"kinematics_{run}.npy"
+            saveKinematics(runStat, f"pages/api/{folderName}/{saveName}/{fileName}")
+            stat[run] = {
+                **{name: v for name, v in runStat.items() if name not in KINEMATICS_STATS},
+                "kinematics": fileName,
+            }
+
+    df, arrays = splitStats(stat)
+    pd.DataFrame.to_csv(df, f"pages/api/{folderName}/{saveName}/stat.csv", index_label="run")
+    np.savez(f"pages/api/{folderName}/{saveName}/stats.npz", **arrays)
 
     if folderName == "stats":
         c = bcolors.OKGREEN
@@ -258,3 +230,313 @@ def saveStat(stat, params, saveName, folderName="stats"):
             + f"{LINE_START}{c+bu}pages/api/{folderName}/{saveName}/{end}"
         )
         print(LINE_START)
+
+
+def splitStats(stat):
+    """Splits the stats of the runs by shape:
+    - the scalar stats are the columns of a table, with a row per run;
+    - the stats with the same shape in every run, like the values per slider, are stacked in
+    (runs, ...) arrays, under their name;
+    - the series, like the times of the missed items or the kinematics of the sliders, are the
+    values of every run one after the other (<name>.values), those of the run k being the rows
+    offset[k] to offset[k + 1] (<name>.offset).
+
+    Args:
+        stat (list[dict]): Stats of each run
+
+    Returns:
+        tuple[pd.DataFrame, dict[str, np.ndarray]]: The table of the scalar stats, and the
+        arrays of the others, by name
+    """
+    names = dict.fromkeys(name for runStat in stat for name in runStat)
+    columns = {}
+    arrays = {}
+    for name in names:
+        values = [runStat.get(name) for runStat in stat]
+        isArray = [isinstance(v, (list, tuple, np.ndarray)) for v in values]
+        if not any(isArray):
+            columns[name] = values
+        elif name not in SERIES_STATS and len({np.shape(v) for v in values}) == 1:
+            arrays[name] = np.array(values)
+        else:
+            series = [np.asarray(v if v is not None else []) for v in values]
+            "Empty series take the dtype and shape of the values of the other runs"
+            template = next((s for s in series if s.size > 0), np.zeros(0))
+            arrays[f"{name}.values"] = np.concatenate(
+                [s.astype(template.dtype).reshape(-1, *template.shape[1:]) for s in series]
+            )
+            arrays[f"{name}.offset"] = np.cumsum([0] + [len(s) for s in series])
+    return pd.DataFrame(columns), arrays
+
+
+def loadStats(folder):
+    """Loads the stats saved by saveStat. Stats saved before stats.npz existed have their lists
+    written as text in stat.csv, and are parsed back.
+
+    Args:
+        folder (str): Folder of the stats
+
+    Returns:
+        tuple[pd.DataFrame, dict[str, np.ndarray], dict[str, list[np.ndarray]]]: The table of
+        the scalar stats, with a row per run. The stats of fixed shape, as (runs, ...) arrays.
+        Then the series of each run, by name. The kinematics of a run are only read from its
+        file when they are accessed
+    """
+    df = pd.read_csv(os.path.join(folder, "stat.csv"))
+    if "run" in df.columns:
+        df = df.set_index("run")
+    vectors = {}
+    series = {}
+    path = os.path.join(folder, "stats.npz")
+    if not os.path.exists(path):
+        for name in df.columns:
+            isText = pd.api.types.is_string_dtype(df[name])
+            if isText and df[name].str.startswith("[").all():
+                df[name] = df[name].map(ast.literal_eval)
+        return df, vectors, series
+
+    with np.load(path) as arrays:
+        for key in arrays.files:
+            name, _, part = key.partition(".")
+            if part == "values":
+                offset = arrays[f"{name}.offset"]
+                series[name] = np.split(arrays[key], offset[1:-1])
+            elif part == "":
+                vectors[name] = arrays[key]
+
+    if "kinematics" in df.columns:
+        paths = [os.path.join(folder, fileName) for fileName in df.pop("kinematics")]
+        for layer, name in enumerate(KINEMATICS_STATS):
+            series[name] = KinematicsSeries(paths, layer)
+    return df, vectors, series
+
+
+class KinematicsSeries:
+    def __init__(self, paths, layer):
+        """One of the kinematics of every run, read from the file of a run, memory-mapped, only
+        when it is accessed. It is indexed by run, like the other series.
+
+        Args:
+            paths (list[str]): Path of the kinematics file of each run
+            layer (int): Index of the kinematics in KINEMATICS_STATS
+        """
+        self.paths = paths
+        self.layer = layer
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, run):
+        return np.load(self.paths[run], mmap_mode="r")[:, self.layer]
+
+
+def saveKinematics(kinematics, path):
+    """Saves the kinematics of a run as a single (records, kinematics, sliders, axes) array,
+    in the order of KINEMATICS_STATS, so that it can be memory-mapped. The file is written under
+    a temporary name first, so that an interruption never leaves half a file.
+
+    Args:
+        kinematics (dict[str, np.ndarray]): The (records, sliders, axes) arrays of the run, by
+        name
+        path (str): Path of the file
+    """
+    with open(f"{path}.tmp", "wb") as f:
+        np.save(f, np.stack([kinematics[name] for name in KINEMATICS_STATS], axis=1))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f"{path}.tmp", path)
+
+
+def appendRunLog(run, kinematics, saveName, folderName="stats"):
+    """Appends a finished run to the run log of the sweep, as a single line. The line is written
+    and flushed to the disk at once, so that an interrupted sweep only loses the runs that were
+    still computing. The kinematics of the run are kept as arrays, in a file of their own, written
+    before the line so that every logged run has them. The stats of the run only get its name.
+
+    Args:
+        run (dict): Indices of the run in the sweep, and its stats
+        kinematics (dict[str, np.ndarray]): The kinematics of the run, by name
+        saveName (str): Name under which the sweep is saved
+    """
+    os.makedirs(f"pages/api/{folderName}/{saveName}", exist_ok=True)
+    path = runKinematicsPath(run, saveName, folderName)
+    saveKinematics(kinematics, path)
+    run["stat"]["kinematics"] = os.path.basename(path)
+
+    line = json.dumps(
+        run,
+        separators=(",", ":"),
+        default=lambda o: np.asarray(o).tolist(),
+    )
+    fd = os.open(
+        f"pages/api/{folderName}/{saveName}/runs.jsonl",
+        os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+        0o644,
+    )
+    try:
+        os.write(fd, (line + "\n").encode())
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def loadRunLog(saveName, folderName="stats"):
+    """Loads the runs already done by a sweep. Their kinematics are left in their file, which is
+    only checked. A run whose kinematics can't be found is ignored, so that it is computed again.
+    So is a line cut by an interruption, which is removed from the log, for the next runs not to
+    be appended to it.
+
+    Args:
+        saveName (str): Name under which the sweep is saved
+
+    Returns:
+        list[dict]: The runs found in the log
+    """
+    path = f"pages/api/{folderName}/{saveName}/runs.jsonl"
+    if not os.path.exists(path):
+        return []
+
+    with open(path, "rb+") as f:
+        lines = f.read()
+        if lines and not lines.endswith(b"\n"):
+            c, end = bcolors.WARNING, bcolors.ENDC
+            print(f"{LINE_START}{c}The last run of the log was cut, it is removed{end}")
+            f.truncate(lines.rfind(b"\n") + 1)
+            f.flush()
+            os.fsync(f.fileno())
+
+    runs = []
+    with open(path) as f:
+        for line in f:
+            try:
+                run = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            kinematicsPath = runKinematicsPath(run, saveName, folderName)
+            try:
+                "Only the header of the file is read"
+                shape = np.load(kinematicsPath, mmap_mode="r").shape
+            except (OSError, ValueError):
+                shape = None
+            if shape is None or shape[1:2] != (len(KINEMATICS_STATS),):
+                c, end = bcolors.WARNING, bcolors.ENDC
+                print(
+                    f"{LINE_START}{c}No kinematics found for run {run['i']}, {run['j']}."
+                    + f" It will be computed again{end}"
+                )
+                continue
+            run["stat"]["kinematics"] = os.path.basename(kinematicsPath)
+            runs.append(run)
+    return runs
+
+
+def hasRunLog(saveName, folderName="stats"):
+    """Checks whether a sweep already logged runs under the given name.
+
+    Args:
+        saveName (str): Name under which the sweep is saved
+
+    Returns:
+        bool: Whether the run log exists
+    """
+    return os.path.exists(f"pages/api/{folderName}/{saveName}/runs.jsonl")
+
+
+def saveSweep(sweep, saveName, folderName="stats"):
+    """Saves the description of a sweep next to its run log, when it starts, so that a resumed
+    sweep can be checked to be the same one.
+
+    Args:
+        sweep (dict): Everything the runs of the sweep depend on: the parameters, the settings,
+        the varied parameter, the number of runs and the root seed
+        saveName (str): Name under which the sweep is saved
+    """
+    os.makedirs(f"pages/api/{folderName}/{saveName}", exist_ok=True)
+    path = f"pages/api/{folderName}/{saveName}/sweep.json"
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(sweep, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f"{path}.tmp", path)
+
+
+def loadSweep(saveName, folderName="stats"):
+    """Loads the description of a sweep, saved by saveSweep.
+
+    Args:
+        saveName (str): Name under which the sweep is saved
+
+    Returns:
+        dict: The description of the sweep, None if there is none
+    """
+    path = f"pages/api/{folderName}/{saveName}/sweep.json"
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def runKinematicsPath(run, saveName, folderName="stats"):
+    """Returns the path of the file holding the kinematics of a run of the sweep.
+
+    Args:
+        run (dict): Indices of the run in the sweep, and its stats
+        saveName (str): Name under which the sweep is saved
+
+    Returns:
+        str: Path of the file
+    """
+    return f"pages/api/{folderName}/{saveName}/kinematics_{run['i']}_{run['j']}.npy"
+
+
+def getPickStream(params, seed, folderName="streams"):
+    """Returns the stream of products of a run: for each row of each input conveyor, the noise on
+    the position of the picks and whether they are bad. The stream only depends on the seed and
+    the products of the input conveyors, so it is generated once, saved, and memory-mapped
+    read-only by every run sharing them, whatever their other parameters.
+
+    Args:
+        params (dict): description of the parameters used for the simulation
+        seed (int): Seed of the run
+
+    Returns:
+        list[np.memmap]: For each input conveyor, an array of shape (nRows, itemsPerRow, 3),
+        with the noise along x and y, and 1 for bad products.
+    """
+    conveyor = params["conveyor"]
+    nbInConveyor = conveyor["nbInConveyor"]
+    itemsPerRow = conveyor["inItemsPerRow"][:nbInConveyor]
+    """A row is generated at the start, then each time the belt moves by the row spacing. One
+    more row is kept as a margin for the rounding of the last step"""
+    nSteps = int(np.ceil(params["duration"] / params["timeStep"]))
+    beltTravel = nSteps * conveyor["speed"][0] * params["timeStep"]
+    nRows = int(np.ceil(beltTravel / conveyor["inRowSpacing"])) + 2
+    "Rows are drawn one after the other, so a longer stream starts with the same products"
+    key = json.dumps(
+        [seed, itemsPerRow, conveyor["badProductRatio"]], separators=(",", ":")
+    )
+    folder = f"pages/api/{folderName}/{hashlib.sha1(key.encode()).hexdigest()[:16]}"
+    paths = [f"{folder}/conveyor_{idx}.npy" for idx in range(nbInConveyor)]
+
+    if not all(
+        os.path.exists(path) and len(np.load(path, mmap_mode="r")) >= nRows
+        for path in paths
+    ):
+        "Draws the products in the same order as Conveyor.generatePicks would"
+        os.makedirs(folder, exist_ok=True)
+        rng = np.random.RandomState(seed)
+        streams = [np.zeros((nRows, n, 3)) for n in itemsPerRow]
+        for row in range(nRows):
+            for idx, n in enumerate(itemsPerRow):
+                streams[idx][row, :, :2] = rng.normal(scale=np.sqrt(0.5), size=(n, 2))
+                streams[idx][row, :, 2] = (
+                    rng.random_sample(n) < conveyor["badProductRatio"]
+                )
+
+        "Written under a temporary name first, in case several processes create it at once"
+        for path, stream in zip(paths, streams):
+            tempPath = f"{path[:-4]}_{os.getpid()}.npy"
+            np.save(tempPath, stream)
+            os.replace(tempPath, path)
+
+    return [np.load(path, mmap_mode="r") for path in paths]
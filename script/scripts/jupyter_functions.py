@@ -20,17 +20,27 @@ def selectFile(names: str, defaultValue=None):
     return file_dropdown
 
 
-def format_data(selected_variable, nBeams, rounding, params, data):
-    v = data[selected_variable].unique()
+def variableValues(selected_variable, data, vectors):
+    # The value of the variable for each run of data. The values of the vectors, like the speeds
+    # of the conveyors, are given as tuples, so that the runs can be grouped by them
+    if selected_variable in vectors:
+        values = vectors[selected_variable][data.index.to_numpy()].tolist()
+        return pd.Series([tuple(value) for value in values], index=data.index)
+    return data[selected_variable]
 
-    workload_data = []
-    pickPerSlider_data = []
-    # Calculate the workload and pickPerSlider for each run
+
+def format_data(selected_variable, nBeams, rounding, params, data, vectors):
+    variable = variableValues(selected_variable, data, vectors)
+    v = variable.unique()
+
+    workload_data = {}
+    pickPerSlider_data = {}
+    # Calculate the workload and pickPerSlider for each run, by index of the run
     for index, row in data.iterrows():
         total_time = row["totalTimeSteps"] - row["startRecordingTime"]
-        workload_data.append(np.array(row["workload"]) / total_time)
-        pickPerSlider_data.append(
-            np.array(row["pickPerSlider"]) * 60 / (total_time * row["dt"])
+        workload_data[index] = vectors["workload"][index] / total_time
+        pickPerSlider_data[index] = (
+            vectors["pickPerSlider"][index] * 60 / (total_time * row["dt"])
         )
 
     formatted_data = pd.DataFrame(
@@ -49,35 +59,27 @@ def format_data(selected_variable, nBeams, rounding, params, data):
 
     # Calculate the average stats per set of parameters
     for idx, val in enumerate(v):
-        index = data[data[selected_variable] == val]["missedDrops"].index
+        # The values can be tuples, that pandas can't compare to a whole column
+        runs = data[variable.map(lambda value: value == val)]
+        index = runs.index
         pickPerSlider_values = [pickPerSlider_data[i] for i in index]
         pickAvg = np.mean(pickPerSlider_values, axis=0)
         workload_values = [workload_data[i] for i in index]
         workloadAvg = np.mean(workload_values, axis=0)
         workloadSTD = np.std(workload_values, axis=0)
 
-        missedPicks = (
-            data[data[selected_variable] == val]["missedPicks"].values
-            * 100
-            / data[data[selected_variable] == val]["totalPicks"].values
-        )
+        missedPicks = runs["missedPicks"].values * 100 / runs["totalPicks"].values
 
         missedPicksMean = round(missedPicks.mean(), rounding)
         missedPicksSTD = round(missedPicks.std(), rounding)
 
-        missedDrops = (
-            data[data[selected_variable] == val]["missedDrops"].values
-            * 100
-            / data[data[selected_variable] == val]["totalDrops"].values
-        )
+        missedDrops = runs["missedDrops"].values * 100 / runs["totalDrops"].values
 
         missedDropsMean = round(missedDrops.mean(), rounding)
         missedDropsSTD = round(missedDrops.std(), rounding)
         unfilledPackages = round(
             (
-                data[data[selected_variable] == val]["unfilledPackages"].values
-                * 100
-                / data[data[selected_variable] == val]["totalPackages"].values
+                runs["unfilledPackages"].values * 100 / runs["totalPackages"].values
             ).mean(),
             rounding,
         )
@@ -103,7 +105,7 @@ def format_data(selected_variable, nBeams, rounding, params, data):
 
         for i in range(nBeams):
             if selected_variable == "scheduling":
-                newRow[f"beam_{i}"] = eval(val)[i]
+                newRow[f"beam_{i}"] = val[i]
             else:
                 newRow[f"beam_{i}"] = params["beam"]["scheduling"][i]
         formatted_data.loc[idx] = newRow
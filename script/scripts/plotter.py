@@ -246,13 +246,13 @@ def initializePlot(conveyors, sliders, beams, params, ax, animated=True):
         )
 
     # Initialize picks
-    for picks in conveyors.listPicks.values():
-        color = colorPicks(picks["status"])
+    picks = conveyors.picks
+    for pickID in picks.handles():
+        color = colorPicks(picks.status[pickID])
         if color == False:
             continue
         scatter = ax.scatter(
-            picks["pos"][0],
-            picks["pos"][1],
+            *picks.positions(pickID),
             color=color,
             s=50,
             animated=animated,
@@ -260,16 +260,16 @@ def initializePlot(conveyors, sliders, beams, params, ax, animated=True):
         plot_elements["picks"].append(scatter)
 
     # Initialize drops
-    for drops in conveyors.listDrops.values():
-        color = colorDrops(drops["status"])
+    drops = conveyors.drops
+    for dropID in drops.handles():
+        color = colorDrops(drops.status[dropID])
         if color == False:
             color = "red"
             alpha = 0.6
         else:
             alpha = 0.3
         scatter = ax.scatter(
-            drops["pos"][0],
-            drops["pos"][1],
+            *drops.positions(dropID),
             color=color,
             s=50,
             edgecolor="black",
@@ -319,13 +319,14 @@ def updatePlot(conveyors, sliders, plot_elements):
 
     # Update picks
     ## change both of these loops. It updates the existings scatters, but doesnt add new ones
-    for scatter, picks in zip(
+    picks = conveyors.picks
+    for scatter, pickID in zip(
         plot_elements["picks"],
-        conveyors.listPicks.values(),
+        picks.handles(),
     ):
         # TODO peut etre plus simple à écrire
-        scatter.set_offsets([picks["pos"][0], picks["pos"][1]])
-        status = picks["status"]
+        scatter.set_offsets(picks.positions(pickID))
+        status = picks.status[pickID]
         color = colorPicks(status)
         if color == False:
             scatter.set_visible(False)
@@ -334,12 +335,13 @@ def updatePlot(conveyors, sliders, plot_elements):
         updated_artists.append(scatter)
 
     # Update drops
-    for scatter, drops in zip(
+    drops = conveyors.drops
+    for scatter, dropID in zip(
         plot_elements["drops"],
-        conveyors.listDrops.values(),
+        drops.handles(),
     ):
-        scatter.set_offsets([drops["pos"][0], drops["pos"][1]])
-        status = drops["status"]
+        scatter.set_offsets(drops.positions(dropID))
+        status = drops.status[dropID]
 
         if status == DONE:
             scatter.set_alpha(0.6)
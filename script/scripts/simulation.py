@@ -0,0 +1,203 @@
+import numpy as np
+import copy
+
+from description.objects import *
+from description.constants import *
+from scripts.json_handler import getPickStream
+from scripts.history_handler import HistoryRecorder, HISTORY_EVENTS
+from scripts.trajectoryControl import setExtraLookingRange
+
+import scripts.pickControl as pick
+import scripts.dropControl as drop
+import scripts.compute_trajectory as move
+import scripts.eventControl as event
+import description.config as cfg
+
+
+def initRuckig(*args: Object):
+    for obj in args:
+        if isinstance(obj, list):
+            initRuckig(*obj)
+        else:
+            move.initRuckig(obj)
+
+
+class Simulation:
+    def __init__(
+        self,
+        params: dict,
+        settings: dict = None,
+        seed: int = None,
+        pickStream: bool = False,
+        isJsonSaved: bool = False,
+    ):
+        """A run of the machine. It owns its clock, its settings, its random generator, its stats
+        and its objects, so that any number of simulations can be built, run and thrown away in
+        the same process.
+
+        Args:
+            params (dict): description of the parameters used for the simulation
+            settings (dict, optional): Settings of the run, with the keys of
+            cfg.settingsTemplate. Defaults to None, to use the default settings.
+            seed (int, optional): Seed of the run. Defaults to None, to draw a random one.
+            pickStream (bool, optional): Whether the products are replayed from the
+            pre-generated stream of the seed. Defaults to False.
+            isJsonSaved (bool, optional): Whether snapshots of the time steps are recorded in
+            the history, at the rate given by the settings. Defaults to False.
+        """
+        self.params = params
+        self.dt = params["timeStep"]  # Time step in [s]
+        self.t = 0
+        self.isJsonSaved = isJsonSaved
+
+        self.settings = copy.deepcopy(cfg.settingsTemplate)
+        if settings is not None:
+            self.settings.update(settings)
+        self.history = (
+            HistoryRecorder(
+                every=self.settings["histEvery"],
+                aroundEvents=self.settings["histAroundEvents"],
+            )
+            if isJsonSaved
+            else None
+        )
+        self.preMove = self.settings["preMove"]
+        self.stateBouncing = self.settings["stateBouncing"]
+        self.eventDriven = self.settings["eventDriven"]
+        self.planEvery = self.settings["planEvery"]
+        self.conveyorEvery = self.settings["conveyorEvery"]
+        self.recordEvery = self.settings["recordEvery"]
+        "Number of upcoming time steps during which nothing but the conveyors can move"
+        self.quietSteps = 0
+
+        self.stats = cfg.newStatEntry(params)
+        self.stats.update(self.settings)
+        self.stats["dt"] = self.dt
+
+        self.stats["seed"] = seed = cfg.newSeed(seed)
+        self.rng = np.random.RandomState(seed)
+        self.pickStream = getPickStream(params, seed) if pickStream else None
+
+        self.trajectoryCache = move.TrajectoryCache(
+            self.stats, tolerance=self.settings["cacheTolerance"]
+        )
+        self.sliderStates = SliderStates(len(self.stats["workload"]))
+        self.kinematics = cfg.SlidersKinematics(
+            params, len(self.stats["workload"]), self.recordEvery
+        )
+        self.sliders, self.conveyors, self.beams = defineObjects(params, self)
+        "Sliders in the order of their ID, which is their row in sliderStates"
+        self.allSliders = sorted(
+            (s for rail in self.sliders for s in rail), key=lambda s: s.ID
+        )
+        initRuckig(self.conveyors, self.sliders)
+        setExtraLookingRange(self.sliders[0][0], self.conveyors)
+
+    def updateSliders(self) -> None:
+        """Update the state of the sliders. Their kinematics are converted, and their arrival on
+        their target is checked, for all of them at once. Only the sliders that arrived go
+        through the transition tables."""
+        conveyors, beams, states = self.conveyors, self.beams, self.sliderStates
+        "A trajectory is only planned again when the target, as given to Ruckig, changed"
+        target = np.round(states.target * MM_TO_M, ROUNDING_DECIMALS)
+        hasNewTarget = np.any(target != states.plannedTarget, axis=1)
+        states.plannedTarget[hasNewTarget] = target[hasNewTarget]
+        nReplans = int(np.count_nonzero(hasNewTarget))
+        self.stats["trajectoryReplans"] += nReplans
+        self.stats["trajectoryReplays"] += len(self.allSliders) - nReplans
+
+        for s in self.allSliders:
+            states.sampled[:, s.ID] = move.updateRuckig(s, hasNewTarget[s.ID])
+        np.multiply(states.sampled, M_TO_MM, out=states.kinematics)
+
+        "Sliders picking or placing follow their target, the others their target position"
+        status = np.array([s.status for s in self.allSliders])
+        railStatus = beams.railStatus[states.rail]
+        referencePos = states.target[:, :2].copy()
+        for listTargets, state in (
+            (conveyors.picks, PICKING),
+            (conveyors.drops, PLACING),
+        ):
+            isTracking = (railStatus == state) & (status == state)
+            if isTracking.any():
+                trackedID = np.array(
+                    [self.allSliders[k].trackedTargetID for k in np.flatnonzero(isTracking)]
+                )
+                referencePos[isTracking] = listTargets.positions(trackedID)
+
+        hasArrived = np.all(
+            np.abs(states.position[:, :2] - referencePos) < conveyors.errorMargin, axis=1
+        ) & np.all(np.abs(states.velocity) <= states.safetyMargin[:, None], axis=1)
+        "Record the number of timesteps where a slider is moving"
+        states.workload += ~hasArrived
+
+        "Only the sliders that reached their target position can change state"
+        arrivedID = np.flatnonzero(hasArrived)
+        nextSlidersStates(
+            [self.allSliders[k] for k in arrivedID], railStatus[arrivedID], conveyors
+        )
+
+        for rail in self.sliders:
+            if all(s.status not in (Z_MVMT, PLACING, PICKING) for s in rail):
+                beams.nextRailState(rail, conveyors)
+
+    def step(self, n: int = 1) -> None:
+        """Computes the next time steps of the simulation.
+
+        Args:
+            n (int, optional): Number of time steps to compute. Defaults to 1.
+        """
+        sliders, conveyors, beams = self.sliders, self.conveyors, self.beams
+        for _ in range(n):
+            "Sliders are updated at every step, the other subsystems at their own rate"
+            isMaintained = self.t % self.conveyorEvery == 0
+            if self.quietSteps > 0:
+                "Until the next event, nothing but the conveyors can move"
+                conveyors.moveConveyors(self.t, maintain=isMaintained)
+                self.quietSteps -= 1
+
+            else:
+                if self.t % self.planEvery == 0:
+                    "Assign picks to sliders"
+                    pick.assignPicks(sliders, conveyors, beams)
+                    drop.assignDrops(sliders, conveyors, beams)
+
+                "Update map"
+                conveyors.moveConveyors(self.t, maintain=isMaintained)
+                self.updateSliders()
+            if self.t % self.recordEvery == 0:
+                self.kinematics.record(self.sliderStates, beams.direction)
+            if self.isJsonSaved:
+                self.history.record(
+                    self.t,
+                    sliders,
+                    conveyors,
+                    beams,
+                    sum(self.stats[name] for name in HISTORY_EVENTS),
+                    isLast=(self.t + 1) * self.dt >= self.params["duration"],
+                )
+            self.t += 1
+
+            if self.eventDriven and self.quietSteps == 0:
+                self.quietSteps = event.countQuietSteps(sliders, conveyors, beams)
+                self.stats["skippedSteps"] += self.quietSteps
+
+    def runUntil(self, time: float) -> None:
+        """Computes the time steps of the simulation until the given time is reached.
+
+        Args:
+            time (float): Time to reach, in [s]
+        """
+        while self.t * self.dt < time:
+            self.step()
+
+    def results(self) -> dict:
+        """Returns the stats collected since the start of the simulation.
+
+        Returns:
+            dict: The stats of the simulation
+        """
+        self.stats["totalTimeSteps"] = self.t
+        self.stats["workload"] = self.sliderStates.workload.tolist()
+        self.stats.update(self.kinematics.results())
+        return self.stats
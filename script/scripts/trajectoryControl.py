@@ -2,62 +2,82 @@ from description.objects import *
 from description.constants import *
 import traceback
 import scripts.compute_trajectory as move
-import description.config as cfg
 import copy as copy
 
 
-def findPicksInRange(
+def getLookingWindow(
     conveyors: Conveyor,
     beams: Beam,
     rail: list[Slider],
-) -> np.ndarray:
-    """Check what pick location are available for the current rail.
+    inOrOut: str,
+) -> tuple[float, float]:
+    """Computes the range, along the conveyor, in which the rail looks for targets. It is the
+    reach of the sliders, extended upstream to take into account the slider's translation time.
 
     Args:
-        conveyors (Conveyor): object of the class Conveyor, containing all of the informations
-                              regarding conveyors
-        beams (Beam): object of the class Beam, containing all of the informations regarding beams
+        conveyors (Conveyor): Conveyor object containing information about the conveyors.
+        beams (Beam): Beam object containing beam information.
         rail (list[Slider]): List of sliders that are on the same rail.
-    """
-    listPicksPos = np.array([pick["pos"] for pick in conveyors.listPicks.values()])
-    status = np.array([pick["status"] for pick in conveyors.listPicks.values()])
-    rowsID = np.array([pick["rowID"] for pick in conveyors.listPicks.values()])
-    convID = np.array([pick["conveyorID"] for pick in conveyors.listPicks.values()])
+        inOrOut (str): "in" or "out" depending on the target type.
 
+    Returns:
+        tuple[float, float]: Minimal and maximal position of the window.
+    """
     DoIBID = beams.direction[ORTHOG_DIR]
-    DoIC = conveyors.inDirection
+    DoIC = getattr(conveyors, f"{inOrOut}Direction")
     slider = rail[0]
-    railID = slider.ID // 2
+    IdConv = 0 if inOrOut == "in" else 1
+    bouncingState = CAN_PICK if inOrOut == "in" else CAN_PLACE
 
-    "Take only the coordinates along one axis (DoIBID : Direction of Interest of the Beam index)"
-    pickPos = listPicksPos[:, DoIBID]
-    extraDist = conveyors.extraLookingRange[0]
-    
-    if beams.bouncingInitState[railID] == CAN_PICK:
-        extraDist *= N_EXTRA_DIST_BOUNCING 
-        
     "Add a small distance, to take into account the slider's translation time"
+    extraDist = conveyors.extraLookingRange[IdConv]
+    if beams.bouncingInitState[slider.ID // 2] == bouncingState:
+        extraDist *= N_EXTRA_DIST_BOUNCING
 
     extraMinDist = -extraDist if DoIC[DoIC[SAME_DIR]] != -1 else 0
     extraMaxDist = extraDist if DoIC[DoIC[SAME_DIR]] == -1 else 0
 
-    sliderArmMax = slider.maxPosition[DoIBID] + extraMaxDist
-    sliderArmMin = slider.minPosition[DoIBID] + extraMinDist
+    maxPos = slider.maxPosition[DoIBID] + extraMaxDist
+    minPos = slider.minPosition[DoIBID] + extraMinDist
+    return minPos, maxPos
 
-    listTemp3 = np.intersect1d(
-        np.flatnonzero(pickPos < sliderArmMax), np.flatnonzero(pickPos > sliderArmMin)
-    )
+
+def findPicksInRange(
+    conveyors: Conveyor,
+    beams: Beam,
+    rail: list[Slider],
+) -> np.ndarray:
+    """Check what pick location are available for the current rail.
+
+    Args:
+        conveyors (Conveyor): object of the class Conveyor, containing all of the informations
+                              regarding conveyors
+        beams (Beam): object of the class Beam, containing all of the informations regarding beams
+        rail (list[Slider]): List of sliders that are on the same rail.
+    """
+    picks = conveyors.picks
+    DoIBID = beams.direction[ORTHOG_DIR]
+    railID = rail[0].ID // 2
+    sliderArmMin, sliderArmMax = getLookingWindow(conveyors, beams, rail, "in")
+
+    "Only the rows overlapping the rail's window are looked at"
+    window = picks.window(DoIBID, sliderArmMin, sliderArmMax)
+    handles = picks.snapshot["handles"][window]
+    status = picks.snapshot["status"][window]
+    rowsID = picks.snapshot["rowID"][window]
+    convID = picks.snapshot["conveyorID"][window]
+
+    "Take only the coordinates along one axis (DoIBID : Direction of Interest of the Beam index)"
+    pickPos = picks.snapshot["pos"][window, DoIBID]
+    inRange = (pickPos < sliderArmMax) & (pickPos > sliderArmMin)
 
     "Search for any picks that are in the same rows as the ones already found"
-    inSameRow = np.flatnonzero(np.isin(rowsID, rowsID[listTemp3]))
-    validID = np.flatnonzero(
-        ((status == FREE) | (status == SKIPPED))
-        & (convID == beams.workspaceSide[railID // 2])
+    inSameRow = np.isin(rowsID, rowsID[inRange])
+    validID = ((status == FREE) | (status == SKIPPED)) & (
+        convID == beams.workspaceSide[railID // 2]
     )
 
-    listAvailableID = np.intersect1d(inSameRow, validID)
-
-    return np.array(list(conveyors.listPicks.keys()))[listAvailableID]
+    return handles[inSameRow & validID]
 
 
 def findDropsInRange(
@@ -73,27 +93,17 @@ def findDropsInRange(
         beams (Beam): object of the class Beam, containing all of the informations regarding beams
         rail (list[Slider]): List of sliders that are on the same rail.
     """
-    listDropsPos = np.array([drop["pos"] for drop in conveyors.listDrops.values()])
-    status = np.array([drop["status"] for drop in conveyors.listDrops.values()])
-
     DoIBID = beams.direction[ORTHOG_DIR]
-    DoIC = conveyors.outDirection
-    slider = rail[0]
-
-    "Take only the coordinates along one axis (DoIID : Direction of Interest index)"
-    dropPos = listDropsPos[:, DoIBID]
-
-    "Add a small distance, to take into account the slider's translation time"
-    extraDist = conveyors.extraLookingRange[1]
-    
-    if beams.bouncingInitState[slider.ID // 2] == CAN_PLACE:
-        extraDist *= N_EXTRA_DIST_BOUNCING 
+    minPos, maxPos = getLookingWindow(conveyors, beams, rail, "out")
 
-    extraMinDist = -extraDist if DoIC[DoIC[SAME_DIR]] != -1 else 0
-    extraMaxDist = extraDist if DoIC[DoIC[SAME_DIR]] == -1 else 0
+    "Only the packages overlapping the rail's window are looked at"
+    drops = conveyors.drops
+    window = drops.window(DoIBID, minPos, maxPos)
+    handles = drops.snapshot["handles"][window]
+    status = drops.snapshot["status"][window]
 
-    maxPos = slider.maxPosition[DoIBID] + extraMaxDist
-    minPos = slider.minPosition[DoIBID] + extraMinDist
+    "Take only the coordinates along one axis (DoIID : Direction of Interest index)"
+    dropPos = drops.snapshot["pos"][window, DoIBID]
 
     "We only take the drops locations for the corresponding cups (flipped or normal)"
     listTemp = np.flatnonzero(
@@ -105,88 +115,305 @@ def findDropsInRange(
     "We also want to record the total amount of drops in range at time T, for some statistics"
     # if slider.ID // 4 == len(beams.listBeamPos) - 1:
     #     nDropsInRange = len(np.flatnonzero((dropPos < maxPos) & (dropPos > minPos)))
-    #     cfg.listStat[-1]["dropsInRangePerT"][-1] += nDropsInRange
-    return np.array(list(conveyors.listDrops.keys()))[listTemp]
+    #     conveyors.sim.stats["dropsInRangePerT"][-1] += nDropsInRange
+    return handles[listTemp]
+
+
+class InterceptMemo:
+    """Meeting positions of the sliders looking for a target on a rail, with the candidate
+    targets of the current step. findViableTarget tries the candidates in the scheduling order,
+    and a pair is only solved when its target is tried, so that nothing past the first reachable
+    target is computed. A solved pair is kept for the rest of the step: when the target of the
+    second slider collides with the first one, the candidates it already tried are not solved
+    again. The kinematic lower bound discards the hopeless pairs of every candidate at once,
+    before any of them is solved.
+    """
+
+    def __init__(
+        self,
+        conveyors: Conveyor,
+        beams: Beam,
+        sliders: list[Slider],
+        inOrOut: str,
+        listAvailableID: np.ndarray,
+    ):
+        """
+        Args:
+            conveyors (Conveyor): Conveyor object containing information about the conveyors.
+            beams (Beam): Beam object containing beam information.
+            sliders (list[Slider]): Sliders looking for a target.
+            inOrOut (str): "in" or "out" depending on the target type.
+            listAvailableID (np.ndarray): List of available pick/drop IDs.
+        """
+        self.conveyors = conveyors
+        self.sliders = sliders
+        self.inOrOut = inOrOut
+        self.targetIndex = {targetID: j for j, targetID in enumerate(listAvailableID)}
+
+        "DoI: Direction of Interest. Array of 2 values. C stand for conveyor, B stands for beam"
+        DoIC = np.array(getattr(conveyors, f"{inOrOut}Direction"))
+        "DoI_ID : indices of the Direction of Interest. Single value used as an index"
+        DoICID = DoIC[SAME_DIR]
+        "Gives the sign of the direction, regardless of wether it's on x or y"
+        signDoICID = DoIC[DoICID]
+        DoIB = beams.direction
+
+        IdConv = 0 if inOrOut == "in" else 1
+
+        listTargets = conveyors.picks if inOrOut == "in" else conveyors.drops
+        self.targetsPos = listTargets.positions(listAvailableID)
+        shape = (len(sliders), len(listAvailableID))
+        "Meeting position of each pair, nan when the target can't be reached in time"
+        self.meetingPositions = np.full((*shape, 2), np.nan)
+        self.isSolved = np.zeros(shape, dtype=bool)
+        self.startSliderZone = np.zeros(shape)
+        self.endSliderZone = np.zeros(shape)
+        self.reach = np.zeros((len(sliders), 2))
+        self.isHopeless = np.ones(shape, dtype=bool)
+
+        for i, slider in enumerate(sliders):
+            sliderArmMax = slider.maxPosition[DoIB[ORTHOG_DIR]]
+            sliderArmMin = slider.minPosition[DoIB[ORTHOG_DIR]]
+
+            "The target must still be in reach of the slider when it gets to the meeting position"
+            extraDist = conveyors.extraLookingRange[IdConv]
+            if beams.bouncingInitState[slider.ID // 2]:
+                extraDist *= N_EXTRA_DIST_BOUNCING
+            minPos = sliderArmMin - extraDist if signDoICID == 1 else sliderArmMin
+            maxPos = sliderArmMax if signDoICID == 1 else sliderArmMax + extraDist
+            self.reach[i] = minPos, maxPos
+
+            """The slider can meet the target a bit past its arm, as long as the target is still
+            in reach: it only has to be ahead of it by the error margin"""
+            overshoot = (conveyors.errorMargin + conveyors.deltaMove[IdConv]) * signDoICID
+            if signDoICID == 1:
+                self.startSliderZone[i] = np.maximum(sliderArmMin, self.targetsPos[:, DoICID])
+                self.endSliderZone[i] = sliderArmMax + overshoot
+            else:
+                self.startSliderZone[i] = np.minimum(sliderArmMax, self.targetsPos[:, DoICID])
+                self.endSliderZone[i] = sliderArmMin + overshoot
+
+            """The solver rejects a target only if the slider is late both at the start and at the
+            end of its zone. The time left before the target passes each meeting coordinate bounds
+            the travel time, so targets that even a lower bound can't beat are discarded without
+            any trajectory computation"""
+            for zone in (self.startSliderZone[i], self.endSliderZone[i]):
+                zonePos = self.targetsPos * np.abs(DoIC[::-1]) + zone[:, None] * np.abs(DoIC)
+                timeLeft = (
+                    ((zone - self.targetsPos[:, DoICID]) * signDoICID - conveyors.errorMargin)
+                    / conveyors.deltaMove[IdConv]
+                    * conveyors.sim.dt
+                )
+                self.isHopeless[i] &= (
+                    travelTimeLowerBound(slider, zonePos) > timeLeft + conveyors.sim.dt / 10
+                )
+
+    def meetingPosition(self, sliderIndex: int, targetID: int) -> np.ndarray:
+        """Returns the meeting position of a slider with a target, solving the pair if it wasn't
+        already in this step.
+
+        Args:
+            sliderIndex (int): Index of the slider, in the sliders of the memo.
+            targetID (int): ID of the target.
+
+        Returns:
+            np.ndarray: The meeting position, or None if the target can't be reached in time.
+        """
+        j = self.targetIndex[targetID]
+        if not self.isSolved[sliderIndex, j]:
+            self.solve(sliderIndex, j)
+        if np.isnan(self.meetingPositions[sliderIndex, j, 0]):
+            return None
+        return self.meetingPositions[sliderIndex, j].copy()
+
+    def solve(self, sliderIndex: int, j: int) -> None:
+        """Computes the meeting position of a slider with a target.
+
+        Args:
+            sliderIndex (int): Index of the slider, in the sliders of the memo.
+            j (int): Index of the target, in the candidates of the memo.
+        """
+        stats = self.conveyors.sim.stats
+        self.isSolved[sliderIndex, j] = True
+        if self.isHopeless[sliderIndex, j]:
+            stats["interceptsPruned"] += 1
+            return
+
+        meetingPos, nEvaluations = solveIntercept(
+            self.conveyors,
+            self.sliders[sliderIndex],
+            self.inOrOut,
+            self.targetsPos[j],
+            self.startSliderZone[sliderIndex, j],
+            self.endSliderZone[sliderIndex, j],
+            *self.reach[sliderIndex],
+        )
+        stats["interceptSolves"] += 1
+        stats["interceptEvaluations"] += nEvaluations
+
+        if meetingPos is not None:
+            self.meetingPositions[sliderIndex, j] = meetingPos
+
+
+def travelTimeLowerBound(slider: Slider, positions: np.ndarray) -> np.ndarray:
+    """Lower bound of the time the slider needs to reach each of the given positions. Each axis
+    is treated as a bang-bang move, accelerating at maxAccel up to maxVelocity, without any jerk
+    limit and without having to stop at the end. The slider's current velocity is only counted
+    when it already goes towards the position.
+
+    Args:
+        slider (Slider): Slider object that would move.
+        positions (np.ndarray): Positions to reach, of shape (n, 2).
+
+    Returns:
+        np.ndarray: Lower bound of the travel time towards each position, in [s].
+    """
+    maxVelocity = np.array(slider.maxVelocity[:2])
+    maxAccel = np.array(slider.maxAccel[:2])
+    delta = positions - np.array(slider.position[:2])
+    distance = np.abs(delta)
+    velocity = np.clip(np.array(slider.currentVelocity[:2]) * np.sign(delta), 0, maxVelocity)
+
+    "Distance covered until the maximal velocity is reached"
+    accelDistance = (maxVelocity**2 - velocity**2) / (2 * maxAccel)
+    accelTime = (np.sqrt(velocity**2 + 2 * maxAccel * distance) - velocity) / maxAccel
+    cruiseTime = (maxVelocity - velocity) / maxAccel + (distance - accelDistance) / maxVelocity
+    axisTime = np.where(distance <= accelDistance, accelTime, cruiseTime)
+    return axisTime.max(axis=1)
 
 
 def findViableTarget(
     conveyors: Conveyor,
-    beams: Beam,
     slider: Slider,
     inOrOut: str,
     listAvailableID: np.ndarray,
-) -> bool: 
+    interceptMemo: InterceptMemo,
+    sliderIndex: int,
+) -> bool:
     """Find a suitable target inside the list, that the slider will be able to reach in time.
 
     Args:
         conveyors (Conveyor): Conveyor object containing information about the conveyors.
-        beams (Beam): Beam object containing beam information.
         slider (Slider): Slider object that will be assigned to the target.
         inOrOut (str): "in" or "out" depending on the target type.
         listAvailableID (np.ndarray): List of available pick/drop IDs.
+        interceptMemo (InterceptMemo): Meeting positions already solved on the rail in this step.
+        sliderIndex (int): Index of the slider in the intercept memo.
 
     Returns:
         bool: If a suitable target has been found or not
     """
-    "DoI: Direction of Interest. Array of 2 values. C stand for conveyor, B stands for beam"
+    "The first reachable target, in the scheduling order, is assigned"
+    for targetID in listAvailableID:
+        meetingPos = interceptMemo.meetingPosition(sliderIndex, targetID)
+        if meetingPos is not None:
+            setSliderTarget(conveyors, slider, inOrOut, targetID, meetingPos)
+            return True
+    return False
+
+
+def solveIntercept(
+    conveyors: Conveyor,
+    slider: Slider,
+    inOrOut: str,
+    targetPos: np.ndarray,
+    startSliderZone: float,
+    endSliderZone: float,
+    minPos: float,
+    maxPos: float,
+) -> tuple[np.ndarray, int]:
+    """Find the closest meeting position, along the conveyor, where the slider arrives ahead of
+    the target by at least the error margin. This lead is an increasing function of the meeting
+    coordinate: the further the meeting position, the more time the slider has compared to the
+    target. Its root is bracketed between the start and the end of the slider's zone, and found
+    with a safeguarded secant method, falling back to a bisection when it doesn't converge fast
+    enough. The search always keeps the feasible side of the bracket, so the slider is ahead by
+    the error margin wherever it stops. As in the original step-by-step walk, the target is
+    rejected if it is out of [minPos, maxPos] once the slider gets to the meeting position.
+
+    Args:
+        conveyors (Conveyor): Conveyor object containing information about the conveyors.
+        slider (Slider): Slider object that would be assigned to the target.
+        inOrOut (str): "in" or "out" depending on the target type.
+        targetPos (np.ndarray): Current position of the target.
+        startSliderZone (float): Closest meeting coordinate, along the conveyor.
+        endSliderZone (float): Furthest meeting coordinate, along the conveyor.
+        minPos (float): Minimal position of the target, along the conveyor, once the slider
+                        gets to the meeting position.
+        maxPos (float): Maximal position of the target, along the conveyor, once the slider
+                        gets to the meeting position.
+
+    Returns:
+        tuple[np.ndarray, int]: The meeting position, or None if the target can't be reached,
+        and the number of trajectories computed. The slider's trajectory is the one towards the
+        meeting position.
+    """
     DoIC = np.array(getattr(conveyors, f"{inOrOut}Direction"))
-    "DoI_ID : indices of the Direction of Interest. Single value used as an index"
     DoICID = DoIC[SAME_DIR]
-    "Gives the sign of the direction, regardless of wether it's on x or y"
     signDoICID = DoIC[DoICID]
-    DoIB = beams.direction
-    sliderArmMax = slider.maxPosition[DoIB[ORTHOG_DIR]]
-    sliderArmMin = slider.minPosition[DoIB[ORTHOG_DIR]]
     IdConv = 0 if inOrOut == "in" else 1
-
-    extraDist = conveyors.extraLookingRange[IdConv]
-    if beams.bouncingInitState[slider.ID // 2]:
-        extraDist *= N_EXTRA_DIST_BOUNCING 
-
-    minPos = sliderArmMin - extraDist if signDoICID == 1 else sliderArmMin
-    maxPos = sliderArmMax if signDoICID == 1 else sliderArmMax + extraDist
-    """Start a loop around the list of possible targets. Leaves only when something has been found
-    or nothing is suitable."""
-    for targetID in listAvailableID:
-        targetPos = getTargetPos(inOrOut, targetID, conveyors)
-        if signDoICID == 1:
-            startSliderZone = max(sliderArmMin, targetPos[DoICID])
+    tolerance = conveyors.deltaMove[IdConv]
+
+    def computeLead(coord):
+        """Lead of the slider on the target, minus the error margin, when meeting at coord, and
+        whether the target is still in reach by then"""
+        meetingPos = targetPos * np.abs(DoIC[::-1]) + coord * np.abs(DoIC)
+        travel_time = move.computeWholeTrajectory(slider, meetingPos)
+        travel_time = (travel_time + conveyors.sim.dt) - travel_time % conveyors.sim.dt
+        newSliderPos = slider.trajectory.at_time(travel_time)[0][DoICID] * M_TO_MM
+
+        "Computes position of the target after that time"
+        PosCoI = targetPos[DoICID] + (
+            conveyors.deltaMove[IdConv] * travel_time / conveyors.sim.dt * signDoICID
+        )
+        lead = (newSliderPos - PosCoI) * signDoICID - conveyors.errorMargin
+        return lead, meetingPos, minPos <= PosCoI <= maxPos
+
+    lowLead, meetingPos, isInReach = computeLead(startSliderZone)
+    if not isInReach:
+        "The target will be out of reach. Try the next one"
+        return None, 1
+    if lowLead >= 0:
+        return meetingPos, 1
+
+    highLead, highMeetingPos, isInReach = computeLead(endSliderZone)
+    if highLead < 0:
+        "The target will be out of reach before the slider can get ahead of it"
+        return None, 2
+
+    low, high = startSliderZone, endSliderZone
+    nEvaluations = 2
+    lastCoord = high
+    previousWidth = np.inf
+    while abs(high - low) > tolerance and nEvaluations < MAX_INTERCEPT_ITERATIONS:
+        width = abs(high - low)
+        coord = high - highLead * (high - low) / (highLead - lowLead)
+        if (
+            not min(low, high) + tolerance / 2 < coord < max(low, high) - tolerance / 2
+            or width > previousWidth / 2
+        ):
+            "The secant is outside of the bracket, or too slow. Bisect instead"
+            coord = (low + high) / 2
+        previousWidth = width
+
+        lead, meetingPos, isReached = computeLead(coord)
+        nEvaluations += 1
+        lastCoord = coord
+        if lead >= 0:
+            high, highLead, highMeetingPos, isInReach = coord, lead, meetingPos, isReached
         else:
-            startSliderZone = min(sliderArmMax, targetPos[DoICID])
-
-        meetingPos = targetPos * np.abs(DoIC[::-1]) + startSliderZone * np.abs(DoIC)
-        testing = True
-        "Test if the target is reachable or not, considering the time of travel"
-        while testing:
-            travel_time = move.computeWholeTrajectory(slider, meetingPos)
-            travel_time = (travel_time + cfg.dt) - travel_time % cfg.dt
-            newSliderPos = [
-                num * M_TO_MM for num in slider.trajectory.at_time(travel_time)[0]
-            ]
-
-            "Computes position of the target after that time"
-            nextTargetPos = (
-                targetPos + (conveyors.deltaMove[IdConv] * travel_time / cfg.dt) * DoIC
-            )
-            PosCoI = nextTargetPos[DoICID]  #  Position's Coordinate of Interest
+            low, lowLead = coord, lead
 
-            if minPos > PosCoI or PosCoI > maxPos:
-                "The target will be out of reach. Try the next one"
-                testing = False
+    if not isInReach:
+        "The target will be out of reach. Try the next one"
+        return None, nEvaluations
 
-            elif (newSliderPos[DoICID] - PosCoI) * signDoICID < -conveyors.errorMargin:
-                "The slider will be behind the target. Try with a further target position"
-                meetingPos = nextTargetPos
+    if lastCoord != high:
+        "Leave the slider with the trajectory towards the meeting position"
+        move.computeWholeTrajectory(slider, highMeetingPos)
+        nEvaluations += 1
 
-            elif (newSliderPos[DoICID] - PosCoI) * signDoICID < conveyors.errorMargin:
-                "Target is close, but not past the error margin. Try with a further target position"
-                meetingPos = newSliderPos[:-1] + conveyors.deltaMove[IdConv] * DoIC
-
-            else:
-                "The target is reachable"
-                setSliderTarget(conveyors, slider, inOrOut, targetID, meetingPos)
-                return True
-    return False
+    return highMeetingPos, nEvaluations
 
 
 def targetAssignment(
@@ -215,13 +442,11 @@ def targetAssignment(
     """
 
     if inOrOut == "in":
-        tmp = "Pick"
         nextState = PICKING
         nextBouncingState = CAN_PLACE
         scheduling = rail[side].inScheduling
 
     elif inOrOut == "out":
-        tmp = "Drop"
         nextState = PLACING
         nextBouncingState = CAN_PICK
         scheduling = rail[side].outScheduling
@@ -229,7 +454,7 @@ def targetAssignment(
     else:
         raise ValueError("inOrOut must be either 'in' or 'out'")
 
-    listTargets = getattr(conveyors, f"list{tmp}s")
+    listTargets = conveyors.picks if inOrOut == "in" else conveyors.drops
     match scheduling:
         case "FIFO":
             listAvailableID = sortFIFO(listAvailableID, side, listTargets)
@@ -260,13 +485,17 @@ def targetAssignment(
         isFirstSlider = False
     railID = rail[0].ID // 2
 
-    hasFound = findViableTarget(conveyors, beams, slider, inOrOut, listAvailableID)
+    searchingSliders = [slider]
+    if isFirstSlider and rail[side + 1].status not in (SKIPPED, WAITING):
+        searchingSliders.append(rail[side + 1])
+    interceptMemo = InterceptMemo(conveyors, beams, searchingSliders, inOrOut, listAvailableID)
+
+    hasFound = findViableTarget(conveyors, slider, inOrOut, listAvailableID, interceptMemo, 0)
 
     if hasFound:
         """The target has been assigned, we remove it from the list.
         We do not want it assigned to the other slider as well"""
-        condition = listAvailableID == slider.trackedTargetID
-        listAvailableID = np.delete(listAvailableID, condition, axis=0)
+        listAvailableID = listAvailableID[listAvailableID != slider.trackedTargetID]
 
         if beams.bouncingInitState[railID]:
             "We stop the bouncing state"
@@ -276,7 +505,13 @@ def targetAssignment(
 
         if isFirstSlider and rail[side + 1].status not in (SKIPPED, WAITING):
             searchForSecondSlider(
-                rail, conveyors, beams, side, listAvailableID, inOrOut
+                rail,
+                conveyors,
+                beams,
+                side,
+                listAvailableID,
+                inOrOut,
+                interceptMemo,
             )
         else:
             setRemainingPosition(rail, beams, side + 1 * isFirstSlider)
@@ -297,6 +532,7 @@ def searchForSecondSlider(
     side: int,
     listAvailableID: np.ndarray,
     inOrOut: str,
+    interceptMemo: InterceptMemo,
 ) -> None:
     """Attempt to assign a target to the second slider on the rail.
 
@@ -307,11 +543,13 @@ def searchForSecondSlider(
         side (int): Side of the sliders, with respect to the output conveyor.
         listAvailableID (np.ndarray): List of available pick/drop IDs.
         inOrOut (str): "in" or "out" depending on the target type.
+        interceptMemo (InterceptMemo): Meeting positions already solved on the rail in this
+        step. The slider is the second of its sliders.
     """
     hasFound = False
     slider = rail[side + 1]
     while not hasFound:
-        hasFound = findViableTarget(conveyors, beams, slider, inOrOut, listAvailableID)
+        hasFound = findViableTarget(conveyors, slider, inOrOut, listAvailableID, interceptMemo, 1)
         if not hasFound:
             "There aren't any candidate left"
             setRemainingPosition(rail, beams, side + 1)
@@ -378,20 +616,22 @@ def bounceState(beams: Beam, rail: list[Slider], nextBouncingState: int) -> None
             rail[1].status = IDLE
 
 
-def sortFIFO(listAvailableID: np.ndarray, side: int, listTargets: list) -> np.ndarray:
+def sortFIFO(
+    listAvailableID: np.ndarray, side: int, listTargets: ItemStore
+) -> np.ndarray:
     """Sort picks with furthest picks along the conveyor's direction first.
 
     Args:
         listAvailableID (np.ndarray): List of available pick/drop IDs.
         side (int): Side of the picks, with respect to the output conveyor.
-        listTargets (list): List of target positions.
+        listTargets (ItemStore): Store of the picks or drops.
 
     Returns:
-        ndarray: List of the IDs of the picks sorted by distance, IDs for the conveyors.listPicks / listDrops.
+        ndarray: List of the IDs of the picks sorted by distance, handles for conveyors.picks / drops.
     """
-    rowIDs = np.array([listTargets[idx]["rowID"] for idx in listAvailableID])
+    rowIDs = listTargets.rowID[listAvailableID]
 
-    newlistAvailableID = np.array([])
+    newlistAvailableID = np.array([], dtype=int)
     for i in np.unique(rowIDs):
         tempID = listAvailableID[rowIDs == i]
         tempID = tempID[::-1] if side == -1 else tempID
@@ -401,21 +641,23 @@ def sortFIFO(listAvailableID: np.ndarray, side: int, listTargets: list) -> np.nd
     return newlistAvailableID
 
 
-def sortLIFO(listAvailableID: np.ndarray, side: int, listTargets: list) -> np.ndarray:
+def sortLIFO(
+    listAvailableID: np.ndarray, side: int, listTargets: ItemStore
+) -> np.ndarray:
     """Sort picks with closest picks along the conveyor's direction first.
 
     Args:
         listAvailableID (np.ndarray): List of available pick/drop IDs.
         side (int): Side of the picks, with respect to the output conveyor.
-        listTargets (list): List of target positions.
+        listTargets (ItemStore): Store of the picks or drops.
 
     Returns:
-        ndarray: List of the IDs of the picks sorted by distance, IDs for the conveyors.listPicks / listDrops.
+        ndarray: List of the IDs of the picks sorted by distance, handles for conveyors.picks / drops.
     """
 
-    rowIDs = np.array([listTargets[idx]["rowID"] for idx in listAvailableID])
+    rowIDs = listTargets.rowID[listAvailableID]
 
-    newlistAvailableID = np.array([])
+    newlistAvailableID = np.array([], dtype=int)
     for i in np.unique(rowIDs)[::-1]:
         tempID = listAvailableID[rowIDs == i]
         tempID = tempID[::-1] if side == -1 else tempID
@@ -426,7 +668,7 @@ def sortLIFO(listAvailableID: np.ndarray, side: int, listTargets: list) -> np.nd
 
 
 def sortSPT(
-    beams: Beam, listAvailableID: np.ndarray, side: int, listTargets: list
+    beams: Beam, listAvailableID: np.ndarray, side: int, listTargets: ItemStore
 ) -> np.ndarray:
     """Sorts picks with the closest picks along the beam's direction first.
 
@@ -434,13 +676,13 @@ def sortSPT(
         beams (Beam): Beam object containing beam information.
         listAvailableID (np.ndarray): List of available pick/drop IDs.
         side (int): Side of the picks, with respect to the output conveyor.
-        listTargets (list): List of target positions.
+        listTargets (ItemStore): Store of the picks or drops.
 
     Returns:
-        ndarray: List of the IDs of the picks sorted by distance, IDs for the conveyors.listPicks / listDrops.
+        ndarray: List of the IDs of the picks sorted by distance, handles for conveyors.picks / drops.
     """
 
-    listPicksPos = np.array([listTargets[idx]["pos"] for idx in listAvailableID])
+    listPicksPos = listTargets.positions(listAvailableID)
     DoI = beams.direction
     
     # listAvailableID = listAvailableID[np.argsort(listPicksPos[:, DoI[SAME_DIR]])]
@@ -456,7 +698,7 @@ def sortSPT(
 
 
 def sortLPT(
-    beams: Beam, listAvailableID: np.ndarray, side: int, listTargets: list
+    beams: Beam, listAvailableID: np.ndarray, side: int, listTargets: ItemStore
 ) -> np.ndarray:
     """Sorts picks with the farthest picks along the beam's direction first.
 
@@ -464,12 +706,12 @@ def sortLPT(
         beams (Beam): Beam object containing beam information.
         listAvailableID (np.ndarray): List of available pick/drop IDs.
         side (int): Side of the picks, with respect to the output conveyor.
-        listTargets (list): List of target positions.
+        listTargets (ItemStore): Store of the picks or drops.
 
     Returns:
-        ndarray: List of the IDs of the picks sorted by distance, IDs for the conveyors.listPicks / listDrops.
+        ndarray: List of the IDs of the picks sorted by distance, handles for conveyors.picks / drops.
     """
-    listPicksPos = np.array([listTargets[idx]["pos"] for idx in listAvailableID])
+    listPicksPos = listTargets.positions(listAvailableID)
     DoI = beams.direction
     listAvailableID = listAvailableID[
         np.argsort(
@@ -504,7 +746,7 @@ def setExtraLookingRange(slider: Slider, conveyors: Conveyor) -> None:
         conveyors.deltaConveyorPos * np.array(slider.direction),
     )
     t_travel = move.computeWholeTrajectory(slider, targetOtherConveyor)
-    conveyors.extraLookingRange = np.array(conveyors.deltaMove) * t_travel / cfg.dt
+    conveyors.extraLookingRange = np.array(conveyors.deltaMove) * t_travel / conveyors.sim.dt
 
 
 def getTargetPos(inOrOut: str, targetID: int, conveyors: Conveyor) -> np.ndarray:
@@ -522,10 +764,10 @@ def getTargetPos(inOrOut: str, targetID: int, conveyors: Conveyor) -> np.ndarray
         np.ndarray: The position of the target.
     """
     if inOrOut == "in":
-        return conveyors.listPicks[targetID]["pos"]
+        return conveyors.picks.positions(targetID)
 
     elif inOrOut == "out":
-        return conveyors.listDrops[targetID]["pos"]
+        return conveyors.drops.positions(targetID)
 
     else:
         traceback.print_stack()
@@ -544,10 +786,10 @@ def setTargetSkipped(inOrOut: str, targetID: int, conveyors: Conveyor) -> None:
         ValueError: If inOrOut is not "in" or "out".
     """
     if inOrOut == "in":
-        conveyors.listPicks[targetID]["status"] = SKIPPED
+        conveyors.picks.setStatus(targetID, SKIPPED)
 
     elif inOrOut == "out":
-        conveyors.listDrops[targetID]["status"] = SKIPPED
+        conveyors.drops.setStatus(targetID, SKIPPED)
 
     else:
         traceback.print_stack()
@@ -580,11 +822,11 @@ def setSliderTarget(
     )
     slider.trackedTargetID = targetID
     if inOrOut == "in":
-        conveyors.listPicks[targetID]["status"] = ASSIGNED
+        conveyors.picks.setStatus(targetID, ASSIGNED)
         slider.status = PICKING
 
     else:
-        conveyors.listDrops[targetID]["status"] = ASSIGNED
+        conveyors.drops.setStatus(targetID, ASSIGNED)
         slider.status = PLACING
 
 
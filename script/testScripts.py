@@ -1,22 +1,30 @@
-import subprocess
+from time import time
+
+import description.config as cfg
+from scripts.simulation import Simulation
 
 output_file = "results.txt"
-script_to_run = "script/main.py"
 script_args = ["-single_run", "-pre_move", "-state_bouncing", "-no_csv", "-seed", "2065223488"]
 num_iterations = 20  # Adjust as needed
 
+"The simulations are built and run in this process, without starting a new interpreter each time"
+args = cfg.parser(script_args)
+params, _, _, _, _, _, seed, _, settings = cfg.initParams(args)
+params["conveyor"]["speed"] = list(cfg.defineOutSpeed(4250 / 60 * 1.1, params))
+
 results = []
 
 for i in range(num_iterations):
     print(i+1, "/", num_iterations, end="\r")  # Display the progress
-    result = subprocess.run(["python", script_to_run] + script_args, capture_output=True, text=True)
-    
-    if result.returncode != 0:
-        print(f"Error running script: {result.stderr}")
+    time_start = time()
+    try:
+        sim = Simulation(params, settings, seed)
+        sim.runUntil(params["duration"])
+    except Exception as e:
+        print(f"Error running simulation: {e}")
         continue  # Skip this iteration if an error occurs
 
-    last_line = result.stdout.strip().split("\n")[-1]  # Extract the last printed line
-    results.append(last_line)
+    results.append(f"{time() - time_start:.2f}")
 
     # Save to file
     with open(output_file, "w") as f: